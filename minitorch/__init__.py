@@ -2,3 +2,4 @@ from .testing import MathTest, MathTestVariable  # type: ignore # noqa: F401,F40
 from .module import *  # noqa: F401,F403
 from .testing import *  # noqa: F401,F403
 from .datasets import *  # noqa: F401,F403
+from .profiler import *  # noqa: F401,F403
@@ -1,14 +1,33 @@
+from __future__ import annotations
+
 import math
+import mmap
+import queue
 import random
+import struct
+import sys
+import threading
+from array import array
 from dataclasses import dataclass
-from typing import List, Tuple
+from itertools import repeat, starmap
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
 
+def make_pts(N: int, rng: Any = random) -> List[Tuple[float, float]]:
+    """`N` points drawn uniformly from the unit square.
 
-def make_pts(N):
+    `rng` is the `random` module or a `random.Random`, for reproducible
+    points.
+    """
     X = []
     for i in range(N):
-        x_1 = random.random()
-        x_2 = random.random()
+        x_1 = rng.random()
+        x_2 = rng.random()
         X.append((x_1, x_2))
     return X
 
@@ -20,66 +39,489 @@ class Graph:
     y: List[int]
 
 
+class Points(Sequence[Tuple[float, float]]):
+    """List-like view of interleaved `x_1, x_2` values as `(x_1, x_2)` tuples."""
+
+    def __init__(self, values: memoryview) -> None:
+        self.values = values
+
+    def __len__(self) -> int:
+        return len(self.values) // 2
+
+    def __getitem__(self, i: Any) -> Any:
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("point index out of range")
+        return (self.values[2 * i], self.values[2 * i + 1])
+
+    def __iter__(self) -> Iterator[Tuple[float, float]]:
+        values = iter(self.values)
+        return zip(values, values)
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
+def _flat_view(buf: Any, fmt: str) -> memoryview:
+    view = memoryview(buf)
+    if not view.nbytes:
+        # Views with a zero-length dimension cannot be cast.
+        return memoryview(array(fmt))
+    return view.cast("B").cast(fmt)
+
+
+class ColumnarGraph:
+    """A `Graph` stored in flat buffers rather than lists of tuples.
+
+    Takes 17 bytes a point: two packed doubles and one label byte. `X`
+    and `y` can be used wherever a `Graph`'s lists are read.
+
+    Attributes
+    ----------
+        N : Number of points.
+        points : `'d'` memoryview of the interleaved `x_1, x_2` values.
+        labels : `'b'` memoryview of the labels.
+
+    """
+
+    def __init__(self, N: int, points: Any, labels: Any) -> None:
+        self.N = N
+        self.points = _flat_view(points, "d")
+        self.labels = _flat_view(labels, "b")
+        if len(self.points) != 2 * len(self.labels):
+            raise ValueError(
+                f"Got {len(self.points)} coordinates for {len(self.labels)} labels."
+            )
+
+    @classmethod
+    def from_graph(cls, graph: Union[Graph, ColumnarGraph]) -> ColumnarGraph:
+        """Pack the points and labels of `graph`."""
+        points = array("d", [v for p in graph.X for v in p])
+        return cls(graph.N, points, array("b", graph.y))
+
+    def to_graph(self) -> Graph:
+        """Unpack into a list-based `Graph`."""
+        return Graph(self.N, list(self.X), list(self.y))
+
+    @property
+    def X(self) -> Points:
+        """The points, as a list-like sequence of `(x_1, x_2)` tuples."""
+        return Points(self.points)
+
+    @property
+    def y(self) -> memoryview:
+        """The labels."""
+        return self.labels
+
+    @property
+    def x1(self) -> memoryview:
+        """Zero-copy view of the `x_1` column."""
+        return self.points[0::2]
+
+    @property
+    def x2(self) -> memoryview:
+        """Zero-copy view of the `x_2` column."""
+        return self.points[1::2]
+
+    def buffer(self) -> memoryview:
+        """Zero-copy `(points, 2)` view of `X`, e.g. for `numpy.asarray`.
+
+        A memoryview cannot have a zero-length dimension, so an empty graph
+        gives an empty flat view.
+        """
+        if not self.labels:
+            return self.points
+        return self.points.cast("B").cast("d", (len(self.labels), 2))
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (
+            ColumnarGraph,
+            (self.N, array("d", self.points.tobytes()), array("b", self.labels)),
+        )
+
+
+def simple_label(x_1: float, x_2: float) -> int:
+    """Label of a point of the `Simple` dataset: 1 left of `x_1 = 0.5`."""
+    return 1 if x_1 < 0.5 else 0
+
+
+def diag_label(x_1: float, x_2: float) -> int:
+    """Label of a point of the `Diag` dataset: 1 below `x_1 + x_2 = 0.5`."""
+    return 1 if x_1 + x_2 < 0.5 else 0
+
+
+def split_label(x_1: float, x_2: float) -> int:
+    """Label of a point of the `Split` dataset: 1 near the left or right edge."""
+    return 1 if x_1 < 0.2 or x_1 > 0.8 else 0
+
+
+def xor_label(x_1: float, x_2: float) -> int:
+    """Label of a point of the `Xor` dataset: 1 in the top-left and bottom-right."""
+    return 1 if x_1 < 0.5 and x_2 > 0.5 or x_1 > 0.5 and x_2 < 0.5 else 0
+
+
+def circle_label(x_1: float, x_2: float) -> int:
+    """Label of a point of the `Circle` dataset: 1 outside the circle of radius
+    `sqrt(0.1)` around the center.
+    """
+    x1, x2 = x_1 - 0.5, x_2 - 0.5
+    return 1 if x1 * x1 + x2 * x2 > 0.1 else 0
+
+
 def simple(N):
     X = make_pts(N)
-    y = []
-    for x_1, x_2 in X:
-        y1 = 1 if x_1 < 0.5 else 0
-        y.append(y1)
+    y = [simple_label(x_1, x_2) for x_1, x_2 in X]
     return Graph(N, X, y)
 
 
 def diag(N):
     X = make_pts(N)
-    y = []
-    for x_1, x_2 in X:
-        y1 = 1 if x_1 + x_2 < 0.5 else 0
-        y.append(y1)
+    y = [diag_label(x_1, x_2) for x_1, x_2 in X]
     return Graph(N, X, y)
 
 
 def split(N):
     X = make_pts(N)
-    y = []
-    for x_1, x_2 in X:
-        y1 = 1 if x_1 < 0.2 or x_1 > 0.8 else 0
-        y.append(y1)
+    y = [split_label(x_1, x_2) for x_1, x_2 in X]
     return Graph(N, X, y)
 
 
 def xor(N):
     X = make_pts(N)
-    y = []
-    for x_1, x_2 in X:
-        y1 = 1 if x_1 < 0.5 and x_2 > 0.5 or x_1 > 0.5 and x_2 < 0.5 else 0
-        y.append(y1)
+    y = [xor_label(x_1, x_2) for x_1, x_2 in X]
     return Graph(N, X, y)
 
 
 def circle(N):
     X = make_pts(N)
-    y = []
-    for x_1, x_2 in X:
-        x1, x2 = x_1 - 0.5, x_2 - 0.5
-        y1 = 1 if x1 * x1 + x2 * x2 > 0.1 else 0
-        y.append(y1)
+    y = [circle_label(x_1, x_2) for x_1, x_2 in X]
     return Graph(N, X, y)
 
 
-def spiral(N):
+def spiral_pts(
+    N: int, start: int, stop: int
+) -> Tuple[List[Tuple[float, float]], List[int]]:
+    """Points `start` to `stop` of the spiral of size `N`, with their labels.
+
+    The spiral has `N // 2` points on each arm: the first arm, labelled 0,
+    comes first, followed by the second arm, labelled 1.
+    """
 
-    def x(t):
+    def x(t: float) -> float:
         return t * math.cos(t) / 20.0
 
-    def y(t):
+    def y(t: float) -> float:
         return t * math.sin(t) / 20.0
-    X = [(x(10.0 * (float(i) / (N // 2))) + 0.5, y(10.0 * (float(i) / (N //
-        2))) + 0.5) for i in range(5 + 0, 5 + N // 2)]
-    X = X + [(y(-10.0 * (float(i) / (N // 2))) + 0.5, x(-10.0 * (float(i) /
-        (N // 2))) + 0.5) for i in range(5 + 0, 5 + N // 2)]
-    y2 = [0] * (N // 2) + [1] * (N // 2)
+
+    half = N // 2
+    X = []
+    labels = []
+    for k in range(start, stop):
+        if k < half:
+            t = 10.0 * (float(5 + k) / half)
+            X.append((x(t) + 0.5, y(t) + 0.5))
+            labels.append(0)
+        else:
+            t = -10.0 * (float(5 + k - half) / half)
+            X.append((y(t) + 0.5, x(t) + 0.5))
+            labels.append(1)
+    return X, labels
+
+
+def spiral(N):
+    X, y2 = spiral_pts(N, 0, 2 * (N // 2))
     return Graph(N, X, y2)
 
 
-datasets = {'Simple': simple, 'Diag': diag, 'Split': split, 'Xor': xor,
-    'Circle': circle, 'Spiral': spiral}
+datasets = {
+    "Simple": simple,
+    "Diag": diag,
+    "Split": split,
+    "Xor": xor,
+    "Circle": circle,
+    "Spiral": spiral,
+}
+
+dataset_labels: Dict[str, Callable[[float, float], int]] = {
+    "Simple": simple_label,
+    "Diag": diag_label,
+    "Split": split_label,
+    "Xor": xor_label,
+    "Circle": circle_label,
+}
+
+
+# ## Streaming
+
+# Large datasets can be produced as a sequence of fixed-size chunks
+# rather than all at once. Each chunk of a random dataset draws from
+# its own generator, seeded from `(seed, index)`, so any chunk can be
+# rebuilt on its own, e.g. by one of several parallel workers.
+
+
+def dataset_size(name: str, N: int) -> int:
+    """Number of points in dataset `name` built with size `N`."""
+    return 2 * (N // 2) if name == "Spiral" else N
+
+
+def dataset_chunk(
+    name: str, N: int, chunk_size: int, index: int, seed: int = 0
+) -> Graph:
+    """Build chunk `index` of the dataset `name` of size `N`.
+
+    Args:
+    ----
+        name: Key of the dataset in `datasets`.
+        N: Size of the full dataset.
+        chunk_size: Number of points per chunk. The last chunk may be smaller.
+        index: Which chunk to build.
+        seed: Seed of the whole stream.
+
+    Returns:
+    -------
+        A `Graph` holding just the points of this chunk.
+
+    """
+    start = index * chunk_size
+    stop = min(start + chunk_size, dataset_size(name, N))
+    if not 0 <= start < stop:
+        raise IndexError(f"Chunk {index} is out of range for {name} of size {N}.")
+    if name == "Spiral":
+        X, y = spiral_pts(N, start, stop)
+    else:
+        label = dataset_labels[name]
+        X = make_pts(stop - start, random.Random(f"{seed}:{index}"))
+        y = [label(x_1, x_2) for x_1, x_2 in X]
+    return Graph(len(X), X, y)
+
+
+def stream_dataset(
+    name: str, N: int, chunk_size: int = 10_000, seed: int = 0
+) -> Iterator[Graph]:
+    """Lazily generate the dataset `name` of size `N` in chunks.
+
+    Only one chunk is held in memory at a time. Chunk `i` is the same as
+    `dataset_chunk(name, N, chunk_size, i, seed)`.
+    """
+    for index in range(-(-dataset_size(name, N) // chunk_size)):
+        yield dataset_chunk(name, N, chunk_size, index, seed)
+
+
+# ## Bulk generation
+
+# `generate_dataset` builds a whole `ColumnarGraph` at once. With NumPy the
+# points and labels are computed as array expressions; without it, the
+# labels are computed in one `map` over the packed points. The points
+# follow the same distributions as the list-based datasets above, but
+# come from a different generator, so the values differ.
+
+
+def _numpy_dataset(name: str, N: int, seed: Optional[int]) -> ColumnarGraph:
+    if name == "Spiral":
+        half = N // 2
+        t = 10.0 * (np.arange(5, 5 + half, dtype=np.float64) / max(half, 1))
+        first = np.stack([t * np.cos(t), t * np.sin(t)], axis=1) / 20.0
+        # The second arm is the curve at -t, with x and y swapped.
+        second = np.stack([-t * np.sin(-t), -t * np.cos(-t)], axis=1) / 20.0
+        X = np.concatenate([first, second]) + 0.5
+        y = np.repeat(np.array([0, 1], dtype=np.int8), half)
+        return ColumnarGraph(N, X, y)
+
+    X = np.random.default_rng(seed).random((N, 2))
+    x_1, x_2 = X[:, 0], X[:, 1]
+    if name == "Simple":
+        y = x_1 < 0.5
+    elif name == "Diag":
+        y = x_1 + x_2 < 0.5
+    elif name == "Split":
+        y = (x_1 < 0.2) | (x_1 > 0.8)
+    elif name == "Xor":
+        y = ((x_1 < 0.5) & (x_2 > 0.5)) | ((x_1 > 0.5) & (x_2 < 0.5))
+    elif name == "Circle":
+        y = (x_1 - 0.5) ** 2 + (x_2 - 0.5) ** 2 > 0.1
+    else:
+        raise KeyError(name)
+    return ColumnarGraph(N, X, y.astype(np.int8))
+
+
+def _array_dataset(name: str, N: int, seed: Optional[int]) -> ColumnarGraph:
+    if name == "Spiral":
+        X, y = spiral_pts(N, 0, dataset_size(name, N))
+        return ColumnarGraph(N, array("d", [v for p in X for v in p]), array("b", y))
+
+    label = dataset_labels[name]
+    rng = random.Random(seed)
+    points = array("d", starmap(rng.random, repeat((), 2 * N)))
+    values = iter(points)
+    return ColumnarGraph(N, points, array("b", map(label, values, values)))
+
+
+def generate_dataset(
+    name: str, N: int, seed: Optional[int] = None, use_numpy: Optional[bool] = None
+) -> ColumnarGraph:
+    """Generate the dataset `name` of size `N` in bulk.
+
+    Args:
+    ----
+        name: Key of the dataset in `datasets`.
+        N: Number of points.
+        seed: Seed for the points, or None for a fresh one.
+        use_numpy: Force the NumPy (True) or the array (False) version.
+            By default NumPy is used when it is installed.
+
+    Returns:
+    -------
+        The generated `ColumnarGraph`.
+
+    """
+    if use_numpy is None:
+        use_numpy = np is not None
+    if use_numpy:
+        return _numpy_dataset(name, N, seed)
+    return _array_dataset(name, N, seed)
+
+
+# ## On-disk format
+
+# A saved dataset is a 32 byte header followed by the interleaved points
+# as little-endian float64 and the labels as int8, i.e. exactly the
+# buffers of a `ColumnarGraph`. `load_dataset` memory-maps the file and
+# uses those regions in place, so opening a file costs the same whatever
+# its size and several processes loading it share one copy in memory.
+
+_MAGIC = b"MTDS"
+_VERSION = 1
+# magic, version, N, number of points, padding up to 32 bytes
+_HEADER = struct.Struct("<4sIQQ8x")
+
+
+def save_dataset(graph: Union[Graph, ColumnarGraph], path: str) -> None:
+    """Write `graph` to `path` in the binary dataset format."""
+    if not isinstance(graph, ColumnarGraph):
+        graph = ColumnarGraph.from_graph(graph)
+    points: Any = graph.points
+    if sys.byteorder != "little":
+        points = array("d", points.tobytes())
+        points.byteswap()
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, graph.N, len(graph.labels)))
+        f.write(points)
+        f.write(graph.labels)
+
+
+def load_dataset(path: str) -> ColumnarGraph:
+    """Memory-map a dataset written by `save_dataset`.
+
+    The returned graph's buffers are read-only views of the file.
+    """
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    if len(view) < _HEADER.size:
+        raise ValueError(f"{path} is too short to be a dataset file.")
+    magic, version, N, count = _HEADER.unpack(view[: _HEADER.size])
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError(f"{path} is not a version {_VERSION} dataset file.")
+    start = _HEADER.size
+    end = start + 16 * count
+    if len(view) != end + count:
+        raise ValueError(f"{path} has the wrong size for {count} points.")
+    points: Any = view[start:end]
+    if sys.byteorder != "little":
+        points = array("d", points.tobytes())
+        points.byteswap()
+    return ColumnarGraph(N, points, view[end:])
+
+
+# ## Batching
+
+
+def _take(graph: Union[Graph, ColumnarGraph], index: Sequence[int]) -> Any:
+    if isinstance(graph, ColumnarGraph):
+        X, y = graph.points, graph.labels
+        points = array("d", [X[k] for i in index for k in (2 * i, 2 * i + 1)])
+        return ColumnarGraph(len(index), points, array("b", [y[i] for i in index]))
+    return Graph(len(index), [graph.X[i] for i in index], [graph.y[i] for i in index])
+
+
+def _slice(graph: Union[Graph, ColumnarGraph], lo: int, hi: int) -> Any:
+    if isinstance(graph, ColumnarGraph):
+        return ColumnarGraph(
+            hi - lo, graph.points[2 * lo : 2 * hi], graph.labels[lo:hi]
+        )
+    return Graph(hi - lo, graph.X[lo:hi], graph.y[lo:hi])
+
+
+def _prefetch(items: Iterator[Any], size: int) -> Iterator[Any]:
+    # Build items on a background thread, at most `size` ahead of the reader.
+    q: queue.Queue = queue.Queue(size)
+    stop = threading.Event()
+    end = object()
+
+    def fill() -> None:
+        try:
+            for item in items:
+                if stop.is_set():
+                    return
+                q.put((item, None))
+        except BaseException as e:
+            q.put((end, e))
+            return
+        q.put((end, None))
+
+    threading.Thread(target=fill, daemon=True).start()
+    try:
+        while True:
+            item, error = q.get()
+            if error is not None:
+                raise error
+            if item is end:
+                return
+            yield item
+    finally:
+        # Unblock the filler if the reader stopped early.
+        stop.set()
+        while True:
+            try:
+                q.get_nowait()
+            except queue.Empty:
+                break
+
+
+def batches(
+    graph: Union[Graph, ColumnarGraph],
+    batch_size: int,
+    shuffle: bool = False,
+    seed: Optional[int] = None,
+    prefetch: int = 2,
+) -> Iterator[Any]:
+    """Iterate over `graph` in batches of at most `batch_size` points.
+
+    Args:
+    ----
+        graph: `Graph` or `ColumnarGraph` to split. Batches have the same type.
+        batch_size: Number of points per batch. The last batch may be smaller.
+        shuffle: Visit the points in a random order.
+        seed: Seed for the order when shuffling.
+        prefetch: Number of batches to build ahead on a background thread,
+            or 0 to build each one when it is asked for.
+
+    Returns:
+    -------
+        Iterator over the batches.
+
+    """
+    size = len(graph.X)
+    starts = range(0, size, batch_size)
+    if shuffle:
+        order = list(range(size))
+        random.Random(seed).shuffle(order)
+        items = (_take(graph, order[lo : lo + batch_size]) for lo in starts)
+    else:
+        items = (_slice(graph, lo, min(lo + batch_size, size)) for lo in starts)
+    if prefetch <= 0:
+        return items
+    return _prefetch(items, prefetch)
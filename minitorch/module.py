@@ -1,6 +1,141 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional, Sequence, Tuple
+import itertools
+import weakref
+from array import array
+from collections import OrderedDict
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from . import operators
+
+# Hooks called around `forward` of every module, keyed by handle id.
+_global_forward_pre_hooks: Dict[int, Callable[..., Any]] = {}
+_global_forward_hooks: Dict[int, Callable[..., Any]] = {}
+# Ids of the forward hooks registered with `always_call=True`.
+_always_called: Set[int] = set()
+_handle_ids = itertools.count()
+
+# Bumped whenever any hook is added or removed. Each module keeps the
+# tuples of hooks to call along with the version they were built at, so
+# `__call__` only compares one integer before running them.
+_hook_version = 0
+
+
+def _hooks_changed() -> None:
+    global _hook_version
+    _hook_version += 1
+
+
+class _Version:
+    """Counter a `CachedModule` shares with the modules and parameters it wraps.
+
+    Only trees wrapped by a `CachedModule` hold any, so changes to other
+    parameters cost nothing beyond an empty check.
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0
+
+
+def _watch(val: Parameter | Module, versions: Tuple[_Version, ...]) -> None:
+    """Bump `versions` on every later change to `val` or the tree below it."""
+    if isinstance(val, Parameter):
+        val._watch(versions)
+        return
+    stack = [val]
+    while stack:
+        d = stack.pop().__dict__
+        new = tuple(v for v in versions if v not in d["_versions"])
+        # A module that already has these has passed them on below.
+        if new:
+            d["_versions"] += new
+            for p in d["_parameters"].values():
+                p._watch(new)
+            stack.extend(d["_modules"].values())
+
+
+class RemovableHandle:
+    """Returned by the hook registration functions; `remove` unregisters the hook.
+
+    Can also be used as a context manager that removes the hook on exit.
+    """
+
+    def __init__(self, hooks: Dict[int, Callable[..., Any]]) -> None:
+        self.hooks = hooks
+        self.id = next(_handle_ids)
+
+    def remove(self) -> None:
+        """Unregister the hook. Removing it twice does nothing."""
+        if self.hooks.pop(self.id, None) is not None:
+            _always_called.discard(self.id)
+            _hooks_changed()
+
+    def __enter__(self) -> RemovableHandle:
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.remove()
+
+
+def _add_hook(
+    hooks: Dict[int, Callable[..., Any]],
+    hook: Callable[..., Any],
+    always_call: bool = False,
+) -> RemovableHandle:
+    handle = RemovableHandle(hooks)
+    hooks[handle.id] = hook
+    if always_call:
+        _always_called.add(handle.id)
+    _hooks_changed()
+    return handle
+
+
+def register_module_forward_pre_hook(hook: Callable[..., Any]) -> RemovableHandle:
+    """Call `hook(module, args)` before `forward` of every module.
+
+    If the hook returns something other than None, it is used as the
+    new tuple of positional arguments.
+
+    Returns
+    -------
+        Handle to remove the hook with.
+
+    """
+    return _add_hook(_global_forward_pre_hooks, hook)
+
+
+def register_module_forward_hook(
+    hook: Callable[..., Any], *, always_call: bool = False
+) -> RemovableHandle:
+    """Call `hook(module, args, output)` after `forward` of every module.
+
+    If the hook returns something other than None, it replaces the output.
+
+    Args:
+    ----
+        hook: The hook.
+        always_call: Also call the hook, with `output` None, when
+            `forward` or another hook raises. The exception is re-raised
+            afterwards.
+
+    Returns:
+    -------
+        Handle to remove the hook with.
+
+    """
+    return _add_hook(_global_forward_hooks, hook, always_call)
 
 
 class Module:
@@ -13,6 +148,14 @@ class Module:
         _parameters : Storage of the module's parameters
         training : Whether the module is in training mode or evaluation mode
 
+    The flattened `(name, Parameter)` pairs of the subtree are cached and
+    only rebuilt after a parameter or submodule is added or replaced
+    somewhere below this module.
+
+    Calling a module runs `forward` between its forward hooks. There are
+    no backward hooks: modules have no backward pass to attach them to
+    until autodiff is added in a later module.
+
     """
 
     _modules: Dict[str, Module]
@@ -20,10 +163,34 @@ class Module:
     training: bool
 
     def __init__(self) -> None:
+        self.__dict__["_parents"] = weakref.WeakSet()
+        self.__dict__["_parameter_index"] = None
+        self.__dict__["_versions"] = ()
+        self.__dict__["_forward_pre_hooks"] = {}
+        self.__dict__["_forward_hooks"] = {}
+        self.__dict__["_hooks"] = (-1, (), (), ())
         self._modules = {}
         self._parameters = {}
         self.training = True
 
+    def __getstate__(self) -> Dict[str, Any]:
+        # Weak references cannot be pickled: each module re-registers as
+        # the parent of its children in `__setstate__` instead. The hooks
+        # to call are rebuilt on the next call, since the global hooks and
+        # `_hook_version` belong to this process.
+        state = self.__dict__.copy()
+        del state["_parents"]
+        del state["_hooks"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        d = self.__dict__
+        d.update(state)
+        d.setdefault("_parents", weakref.WeakSet())
+        d["_hooks"] = (-1, (), (), ())
+        for child in state["_modules"].values():
+            child.__dict__.setdefault("_parents", weakref.WeakSet()).add(self)
+
     def modules(self) -> Sequence[Module]:
         """Return the direct child modules of this module."""
         m: Dict[str, Module] = self.__dict__["_modules"]
@@ -47,13 +214,48 @@ class Module:
             The name and `Parameter` of each ancestor parameter.
 
         """
-        # TODO: Implement for Task 0.4.
-        raise NotImplementedError("Need to implement for Task 0.4")
+        return self._index()[0]
 
     def parameters(self) -> Sequence[Parameter]:
         """Enumerate over all the parameters of this module and its descendents."""
-        # TODO: Implement for Task 0.4.
-        raise NotImplementedError("Need to implement for Task 0.4")
+        return self._index()[1]
+
+    def _index(self) -> Tuple[Tuple[Tuple[str, Parameter], ...], Tuple[Parameter, ...]]:
+        index = self.__dict__["_parameter_index"]
+        if index is None:
+            named = list(self.__dict__["_parameters"].items())
+            for name, module in self.__dict__["_modules"].items():
+                named.extend((f"{name}.{k}", p) for k, p in module.named_parameters())
+            index = (tuple(named), tuple(p for _, p in named))
+            self.__dict__["_parameter_index"] = index
+        return index
+
+    def _invalidate(self) -> None:
+        """Drop the cached parameter index here and in every ancestor."""
+        stack = [self]
+        while stack:
+            module = stack.pop()
+            # An ancestor's index is only ever built after this one, so
+            # if this one is already gone, so are theirs.
+            if module.__dict__["_parameter_index"] is None:
+                continue
+            module.__dict__["_parameter_index"] = None
+            stack.extend(module.__dict__["_parents"])
+
+    def flatten_parameters(self) -> FlatParameters:
+        """Pack the parameters of this module and its descendents into one buffer.
+
+        Each parameter becomes a view onto its slot of the buffer, so
+        updates through either one are seen by the other. Only parameters
+        holding plain numbers can be packed. Parameters added afterwards
+        are not part of the buffer.
+
+        Returns
+        -------
+            The `FlatParameters` holding the packed values.
+
+        """
+        return FlatParameters(self.named_parameters())
 
     def add_parameter(self, k: str, v: Any) -> Parameter:
         """Manually add a parameter. Useful helper for scalar parameters.
@@ -70,26 +272,123 @@ class Module:
         """
         val = Parameter(v, k)
         self.__dict__["_parameters"][k] = val
+        self._register(k, val)
         return val
 
+    def _register(self, key: str, val: Parameter | Module) -> None:
+        # Keep registered parameters and submodules in the instance dict
+        # as well, so reading them is a plain attribute lookup rather
+        # than a call to `__getattr__`. Names that would shadow something
+        # on the class or the module's own state, such as `training`, are
+        # left to `__getattr__` as before.
+        d = self.__dict__
+        if not hasattr(type(self), key) and (
+            key not in d or isinstance(d[key], (Parameter, Module))
+        ):
+            d[key] = val
+        self._invalidate()
+        versions = self.__dict__["_versions"]
+        if versions:
+            _watch(val, versions)
+            for v in versions:
+                v.value += 1
+
     def __setattr__(self, key: str, val: Parameter) -> None:
         if isinstance(val, Parameter):
             self.__dict__["_parameters"][key] = val
+            self._register(key, val)
         elif isinstance(val, Module):
             self.__dict__["_modules"][key] = val
+            val.__dict__["_parents"].add(self)
+            self._register(key, val)
         else:
             super().__setattr__(key, val)
 
     def __getattr__(self, key: str) -> Any:
-        if key in self.__dict__["_parameters"]:
-            return self.__dict__["_parameters"][key]
-
-        if key in self.__dict__["_modules"]:
-            return self.__dict__["_modules"][key]
+        d = self.__dict__
+        if key in d["_parameters"]:
+            return d["_parameters"][key]
+        if key in d["_modules"]:
+            return d["_modules"][key]
         return None
 
+    def register_forward_pre_hook(self, hook: Callable[..., Any]) -> RemovableHandle:
+        """Call `hook(module, args)` before every call to this module's `forward`.
+
+        If the hook returns something other than None, it is used as the
+        new tuple of positional arguments. Hooks registered with
+        `register_module_forward_pre_hook` run first.
+
+        Returns
+        -------
+            Handle to remove the hook with.
+
+        """
+        return _add_hook(self.__dict__["_forward_pre_hooks"], hook)
+
+    def register_forward_hook(
+        self, hook: Callable[..., Any], *, always_call: bool = False
+    ) -> RemovableHandle:
+        """Call `hook(module, args, output)` after every call to this module's `forward`.
+
+        If the hook returns something other than None, it replaces the
+        output. Hooks registered with `register_module_forward_hook` run
+        after this module's own.
+
+        Args:
+        ----
+            hook: The hook.
+            always_call: Also call the hook, with `output` None, when
+                `forward` or another hook raises. The exception is
+                re-raised afterwards.
+
+        Returns:
+        -------
+            Handle to remove the hook with.
+
+        """
+        return _add_hook(self.__dict__["_forward_hooks"], hook, always_call)
+
+    def _build_hooks(self) -> Tuple[int, Tuple, Tuple, Tuple]:
+        d = self.__dict__
+        forward_hooks = (*d["_forward_hooks"].items(), *_global_forward_hooks.items())
+        hooks = (
+            _hook_version,
+            (*_global_forward_pre_hooks.values(), *d["_forward_pre_hooks"].values()),
+            tuple(hook for _, hook in forward_hooks),
+            tuple(i in _always_called for i, _ in forward_hooks),
+        )
+        d["_hooks"] = hooks
+        return hooks
+
     def __call__(self, *args: Any, **kwargs: Any) -> Any:
-        return self.forward(*args, **kwargs)
+        """Run `forward`, with any registered hooks around it."""
+        version, pre_hooks, hooks, always = self.__dict__["_hooks"]
+        if version != _hook_version:
+            version, pre_hooks, hooks, always = self._build_hooks()
+        if not (pre_hooks or hooks):
+            return self.forward(*args, **kwargs)
+
+        # Forward hooks already called, so that the error path below calls
+        # each `always_call` hook at most once.
+        called = 0
+        try:
+            for hook in pre_hooks:
+                result = hook(self, args)
+                if result is not None:
+                    args = result if isinstance(result, tuple) else (result,)
+            output = self.forward(*args, **kwargs)
+            for hook in hooks:
+                called += 1
+                result = hook(self, args, output)
+                if result is not None:
+                    output = result
+        except BaseException:
+            for hook, always_call in zip(hooks[called:], always[called:]):
+                if always_call:
+                    hook(self, args, None)
+            raise
+        return output
 
     def __repr__(self) -> str:
         def _addindent(s_: str, numSpaces: int) -> str:
@@ -119,6 +418,94 @@ class Module:
         return main_str
 
 
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+def _freeze(x: Any) -> Any:
+    # Lists of points, e.g. `[[0.1, 0.2]]`, become hashable tuples.
+    if isinstance(x, (list, tuple)):
+        return tuple(_freeze(v) for v in x)
+    return x
+
+
+class CachedModule(Module):
+    """Wrap a module to reuse its outputs for repeated inputs.
+
+    Calls are looked up by their arguments, with lists compared as
+    tuples. Changing a parameter of the wrapped module with
+    `Parameter.update` or a `FlatParameters` operation, or adding a
+    parameter or submodule to it, clears the cache; changes to other
+    modules do not. The least recently used outputs are dropped beyond
+    `maxsize`. Calls with unhashable arguments are passed through
+    uncached.
+
+    Outputs are returned as stored, not copied, so they must not be
+    modified in place.
+
+    Args:
+    ----
+        module: The module to wrap. It is registered as the submodule
+            `module`.
+        maxsize: Most outputs to keep.
+
+    """
+
+    def __init__(self, module: Module, maxsize: int = 1024) -> None:
+        super().__init__()
+        version = _Version()
+        self.__dict__["_version"] = version
+        self.__dict__["_versions"] = (version,)
+        self.module = module
+        self.maxsize = maxsize
+        self.__dict__["_cache"] = OrderedDict()
+        self.__dict__["_cache_version"] = version.value
+        self.__dict__["hits"] = 0
+        self.__dict__["misses"] = 0
+
+    def forward(self, *args: Any, **kwargs: Any) -> Any:
+        """Return the stored output for these arguments, or compute and store it."""
+        d = self.__dict__
+        cache = d["_cache"]
+        version = d["_version"].value
+        if d["_cache_version"] != version:
+            cache.clear()
+            d["_cache_version"] = version
+        key = (_freeze(args), _freeze(sorted(kwargs.items())))
+        try:
+            output = cache[key]
+        except KeyError:
+            pass
+        except TypeError:
+            d["misses"] += 1
+            return d["module"](*args, **kwargs)
+        else:
+            cache.move_to_end(key)
+            d["hits"] += 1
+            return output
+
+        d["misses"] += 1
+        output = d["module"](*args, **kwargs)
+        cache[key] = output
+        if len(cache) > self.maxsize:
+            cache.popitem(last=False)
+        return output
+
+    def cache_info(self) -> CacheInfo:
+        """Hit and miss counts and the size of the cache, like `functools.lru_cache`."""
+        d = self.__dict__
+        return CacheInfo(d["hits"], d["misses"], self.maxsize, len(d["_cache"]))
+
+    def cache_clear(self) -> None:
+        """Drop every stored output and reset the counts."""
+        d = self.__dict__
+        d["_cache"].clear()
+        d["hits"] = d["misses"] = 0
+
+
 class Parameter:
     """A Parameter is a special container stored in a `Module`.
 
@@ -126,24 +513,169 @@ class Parameter:
     any value for testing.
     """
 
+    __slots__ = ("value", "name", "_versions", "_storage", "_offset")
+
+    value: Any
+    name: Optional[str]
+    _versions: Optional[List[_Version]]
+
     def __init__(self, x: Any, name: Optional[str] = None) -> None:
         self.value = x
         self.name = name
+        self._versions = None
         if hasattr(x, "requires_grad_"):
             self.value.requires_grad_(True)
             if self.name:
                 self.value.name = self.name
 
     def update(self, x: Any) -> None:
-        """Update the parameter value."""
+        """Update the parameter value.
+
+        Use this rather than assigning to `value`, so `CachedModule`
+        outputs computed with the old value are not reused.
+        """
         self.value = x
+        if self._versions:
+            for v in self._versions:
+                v.value += 1
         if hasattr(x, "requires_grad_"):
             self.value.requires_grad_(True)
             if self.name:
                 self.value.name = self.name
 
+    def _watch(self, versions: Tuple[_Version, ...]) -> None:
+        old = self._versions or []
+        self._versions = old + [v for v in versions if v not in old]
+
     def __repr__(self) -> str:
         return repr(self.value)
 
     def __str__(self) -> str:
         return str(self.value)
+
+
+class _FlatParameter(Parameter):
+    """A `Parameter` whose value is a slot of a `FlatParameters` buffer."""
+
+    __slots__ = ()
+
+    _storage: array
+    _offset: int
+
+    @property
+    def value(self) -> float:
+        return self._storage[self._offset]
+
+    @value.setter
+    def value(self, x: float) -> None:
+        self._storage[self._offset] = x
+        if self._versions:
+            for v in self._versions:
+                v.value += 1
+
+    def _watch(self, versions: Tuple[_Version, ...]) -> None:
+        # The list is shared with the `FlatParameters`, whose operations
+        # bump it too, so it is extended in place.
+        self._versions.extend([v for v in versions if v not in self._versions])
+
+    def __getstate__(self) -> Tuple[None, Dict[str, Any]]:
+        # The value is pickled as part of the buffer, which pickle shares
+        # between the parameters of one `FlatParameters`, rather than
+        # through the `value` property, which needs the buffer to be set.
+        state = {
+            "name": self.name,
+            "_versions": self._versions,
+            "_storage": self._storage,
+            "_offset": self._offset,
+        }
+        return None, state
+
+
+class FlatParameters:
+    """Contiguous storage for the numeric parameters of a module tree.
+
+    Created by `Module.flatten_parameters`. Whole-model operations such
+    as an SGD step, zeroing, copying and serialization run as a single
+    bulk operation over `data`.
+
+    Attributes
+    ----------
+        data : `array('d')` holding one value per parameter.
+        names : Dotted name of the parameter stored at each offset.
+
+    """
+
+    data: array
+    names: Tuple[str, ...]
+
+    def __init__(self, named: Sequence[Tuple[str, Parameter]]) -> None:
+        values = array("d")
+        for name, p in named:
+            if not isinstance(p.value, (int, float)):
+                raise TypeError(
+                    f"Cannot flatten parameter {name} holding {type(p.value).__name__}."
+                )
+            values.append(p.value)
+        self.data = values
+        self.names = tuple(name for name, _ in named)
+        # One list of the versions watching any of the parameters, shared
+        # by all of them, so an operation on the buffer bumps each once.
+        versions: List[_Version] = []
+        for _, p in named:
+            versions.extend([v for v in p._versions or () if v not in versions])
+        self._versions = versions
+        for offset, (_, p) in enumerate(named):
+            if not isinstance(p, _FlatParameter):
+                # Drop the old value; it now lives in the buffer.
+                p.value = None
+                p.__class__ = _FlatParameter
+            p._storage = values
+            p._offset = offset
+            p._versions = versions
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def _changed(self) -> None:
+        for v in self._versions:
+            v.value += 1
+
+    def zero(self) -> None:
+        """Set every parameter to zero."""
+        memoryview(self.data).cast("B")[:] = bytes(len(self.data) * 8)
+        self._changed()
+
+    def copy_from(self, other: Any) -> None:
+        """Copy every parameter from another buffer of the same length."""
+        src = other.data if isinstance(other, FlatParameters) else other
+        if len(src) != len(self.data):
+            raise ValueError(f"Expected {len(self.data)} values, got {len(src)}.")
+        if not (isinstance(src, array) and src.typecode == "d"):
+            src = array("d", src)
+        self.data[:] = src
+        self._changed()
+
+    def step(self, grads: Sequence[float], lr: float) -> None:
+        """Apply one SGD update, `p = p - lr * g`, to every parameter."""
+        np = operators.np
+        if np is None:
+            operators.zipWithBuffer(
+                lambda p, g: p - lr * g, self.data, grads, self.data
+            )
+        else:
+            view = operators._view(self.data)
+            operators._check_sizes(view, grads)
+            np.subtract(view, lr * np.asarray(grads, dtype=np.float64), out=view)
+        self._changed()
+
+    def tobytes(self) -> bytes:
+        """Serialize every parameter as packed native doubles."""
+        return self.data.tobytes()
+
+    def frombytes(self, b: bytes) -> None:
+        """Load every parameter from the output of `tobytes`."""
+        view = memoryview(self.data).cast("B")
+        if len(b) != len(view):
+            raise ValueError(f"Expected {len(view)} bytes, got {len(b)}.")
+        view[:] = b
+        self._changed()
@@ -1,9 +1,31 @@
 """Collection of the core mathematical operators used throughout the code base."""
 
+from __future__ import annotations
+
+import builtins
+import functools
 import math
+from array import array
 
 # ## Task 0.1
-from typing import Callable, Iterable
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    MutableSequence,
+    Optional,
+    Sequence,
+    Sized,
+    Tuple,
+)
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
 
 #
 # Implementation of a prelude of elementary functions.
@@ -52,3 +74,575 @@ from typing import Callable, Iterable
 
 
 # TODO: Implement for Task 0.3.
+
+
+# ## Bulk operators
+
+# Array-backed variants of the prelude and the higher-order functions
+# above, for running an operator over many elements at once.
+#
+# Each function accepts any sized iterable of floats (`array('d')`,
+# a memoryview cast to `'d'`, a NumPy array, a plain list) and writes
+# its result into `out` if given. Otherwise the result is a new NumPy
+# array if `xs` is one, else a new `array('d')`.
+#
+# When NumPy is installed the named operators run as ufuncs, over
+# zero-copy views of float buffers. Without it they call the prelude
+# functions per element, looked up by name when called so that they
+# always follow the prelude. That path saves the memory of a list of
+# floats rather than time. `map` is looked up from `builtins` as the
+# prelude defines its own.
+
+
+def _prelude(name: str) -> Callable[..., float]:
+    fn = globals().get(name)
+    if fn is None:
+        raise NotImplementedError(f"operators.{name} is not implemented yet.")
+    return fn
+
+
+def _items(xs: Iterable[float]) -> Iterable[float]:
+    # `tolist` boxes a whole buffer at C speed; iterating a NumPy array
+    # would make a NumPy scalar per element.
+    tolist = getattr(xs, "tolist", None)
+    return tolist() if tolist is not None else xs
+
+
+def _check_sizes(xs: Sized, ys: Sized) -> int:
+    n = len(xs)
+    if len(ys) != n:
+        raise ValueError(f"Buffer lengths differ: {n} and {len(ys)}.")
+    return n
+
+
+def _check_out(out: Sized, n: int) -> None:
+    if len(out) != n:
+        raise ValueError(f"Output buffer has length {len(out)}, expected {n}.")
+
+
+def _store(
+    values: Iterable[float],
+    n: int,
+    out: Optional[MutableSequence[float]],
+    like: Any = None,
+) -> MutableSequence[float]:
+    if out is not None:
+        _check_out(out, n)
+    result = array("d", values)
+    if out is None:
+        if np is not None and isinstance(like, np.ndarray):
+            return np.frombuffer(result)
+        return result
+    out[:] = result
+    return out
+
+
+def _view(buf: Any) -> Any:
+    """Zero-copy float64 NumPy view of `buf`, or None if it has none."""
+    if isinstance(buf, np.ndarray):
+        return buf
+    try:
+        m = memoryview(buf)
+    except TypeError:
+        return None
+    if m.format != "d" or not m.c_contiguous or m.readonly:
+        return None
+    return np.frombuffer(m, dtype=np.float64)
+
+
+def _bulk(
+    name: str, out: Optional[MutableSequence[float]], *inputs: Any
+) -> MutableSequence[float]:
+    xs = inputs[0]
+    n = len(xs) if len(inputs) == 1 else _check_sizes(*inputs)
+    if np is None:
+        fn = _prelude(name)
+        return _store(builtins.map(fn, *[_items(x) for x in inputs]), n, out, xs)
+    if out is not None:
+        _check_out(out, n)
+    elif not isinstance(xs, np.ndarray):
+        out = array("d", [0.0]) * n
+    dest = None if out is None else _view(out)
+    result = _UFUNCS[name](*[np.asarray(x, dtype=np.float64) for x in inputs], dest)
+    if out is None:
+        return result
+    if dest is None:
+        out[:] = array("d", result.tobytes())
+    return out
+
+
+def _np_sigmoid(xs: Any, out: Any) -> Any:
+    # The prelude's two cases at once: e^-|x| / (1 + e^-|x|) for x < 0
+    # and 1 / (1 + e^-|x|) otherwise, so `exp` never overflows.
+    e = np.abs(xs)
+    np.negative(e, out=e)
+    np.exp(e, out=e)
+    denominator = np.add(e, 1.0)
+    np.copyto(e, 1.0, where=xs >= 0.0)
+    return np.divide(e, denominator, out=out)
+
+
+def _np_inv_back(xs: Any, ds: Any, out: Any) -> Any:
+    result = np.divide(ds, np.multiply(xs, xs), out=out)
+    return np.negative(result, out=result)
+
+
+def _np_relu_back(xs: Any, ds: Any, out: Any) -> Any:
+    # Not `ds * (xs > 0)`, which is NaN for an infinite `d` at `x <= 0`.
+    off = ~(xs > 0.0)
+    result = np.multiply(ds, 1.0, out=out)
+    np.copyto(result, 0.0, where=off)
+    return result
+
+
+if np is not None:
+    _UFUNCS: Dict[str, Callable[..., Any]] = {
+        "mul": lambda xs, ys, out: np.multiply(xs, ys, out=out),
+        "add": lambda xs, ys, out: np.add(xs, ys, out=out),
+        "neg": lambda xs, out: np.negative(xs, out=out),
+        "sigmoid": _np_sigmoid,
+        # `fmax` rather than `maximum` so that, as `relu`, NaN gives 0.
+        "relu": lambda xs, out: np.fmax(xs, 0.0, out=out),
+        "log": lambda xs, out: np.log(xs, out=out),
+        "exp": lambda xs, out: np.exp(xs, out=out),
+        "inv": lambda xs, out: np.divide(1.0, xs, out=out),
+        "log_back": lambda xs, ds, out: np.divide(ds, xs, out=out),
+        "inv_back": _np_inv_back,
+        "relu_back": _np_relu_back,
+    }
+
+
+def mapBuffer(
+    fn: Callable[[float], float],
+    xs: Sequence[float],
+    out: Optional[MutableSequence[float]] = None,
+) -> MutableSequence[float]:
+    """Apply `fn` to each element of `xs`.
+
+    Args:
+    ----
+        fn: Function from one value to one value.
+        xs: Input buffer.
+        out: Optional destination of the same length as `xs`. May be `xs`.
+
+    Returns:
+    -------
+        `out`, or a new array holding the result.
+
+    """
+    return _store(builtins.map(fn, _items(xs)), len(xs), out, xs)
+
+
+def zipWithBuffer(
+    fn: Callable[[float, float], float],
+    xs: Sequence[float],
+    ys: Sequence[float],
+    out: Optional[MutableSequence[float]] = None,
+) -> MutableSequence[float]:
+    """Combine `xs` and `ys` elementwise with `fn`.
+
+    Args:
+    ----
+        fn: Function combining two values.
+        xs: First input buffer.
+        ys: Second input buffer, the same length as `xs`.
+        out: Optional destination of the same length. May be `xs` or `ys`.
+
+    Returns:
+    -------
+        `out`, or a new array holding the result.
+
+    """
+    n = _check_sizes(xs, ys)
+    return _store(builtins.map(fn, _items(xs), _items(ys)), n, out, xs)
+
+
+def reduceBuffer(
+    fn: Callable[[float, float], float], start: float, xs: Iterable[float]
+) -> float:
+    """Reduce the buffer `xs` to a single value, starting from `start`."""
+    return functools.reduce(fn, _items(xs), start)
+
+
+def mul_buffer(
+    xs: Sequence[float],
+    ys: Sequence[float],
+    out: Optional[MutableSequence[float]] = None,
+) -> MutableSequence[float]:
+    """Elementwise `mul` of two buffers."""
+    return _bulk("mul", out, xs, ys)
+
+
+def add_buffer(
+    xs: Sequence[float],
+    ys: Sequence[float],
+    out: Optional[MutableSequence[float]] = None,
+) -> MutableSequence[float]:
+    """Elementwise `add` of two buffers."""
+    return _bulk("add", out, xs, ys)
+
+
+def neg_buffer(
+    xs: Sequence[float], out: Optional[MutableSequence[float]] = None
+) -> MutableSequence[float]:
+    """Elementwise `neg` of a buffer."""
+    return _bulk("neg", out, xs)
+
+
+def sigmoid_buffer(
+    xs: Sequence[float], out: Optional[MutableSequence[float]] = None
+) -> MutableSequence[float]:
+    """Elementwise `sigmoid` of a buffer."""
+    return _bulk("sigmoid", out, xs)
+
+
+def relu_buffer(
+    xs: Sequence[float], out: Optional[MutableSequence[float]] = None
+) -> MutableSequence[float]:
+    """Elementwise `relu` of a buffer."""
+    return _bulk("relu", out, xs)
+
+
+def log_buffer(
+    xs: Sequence[float], out: Optional[MutableSequence[float]] = None
+) -> MutableSequence[float]:
+    """Elementwise `log` of a buffer."""
+    return _bulk("log", out, xs)
+
+
+def exp_buffer(
+    xs: Sequence[float], out: Optional[MutableSequence[float]] = None
+) -> MutableSequence[float]:
+    """Elementwise `exp` of a buffer."""
+    return _bulk("exp", out, xs)
+
+
+def inv_buffer(
+    xs: Sequence[float], out: Optional[MutableSequence[float]] = None
+) -> MutableSequence[float]:
+    """Elementwise `inv` of a buffer."""
+    return _bulk("inv", out, xs)
+
+
+def log_back_buffer(
+    xs: Sequence[float],
+    ds: Sequence[float],
+    out: Optional[MutableSequence[float]] = None,
+) -> MutableSequence[float]:
+    """Elementwise `log_back` of a buffer and its incoming derivatives."""
+    return _bulk("log_back", out, xs, ds)
+
+
+def inv_back_buffer(
+    xs: Sequence[float],
+    ds: Sequence[float],
+    out: Optional[MutableSequence[float]] = None,
+) -> MutableSequence[float]:
+    """Elementwise `inv_back` of a buffer and its incoming derivatives."""
+    return _bulk("inv_back", out, xs, ds)
+
+
+def relu_back_buffer(
+    xs: Sequence[float],
+    ds: Sequence[float],
+    out: Optional[MutableSequence[float]] = None,
+) -> MutableSequence[float]:
+    """Elementwise `relu_back` of a buffer and its incoming derivatives."""
+    return _bulk("relu_back", out, xs, ds)
+
+
+def negBuffer(
+    xs: Sequence[float], out: Optional[MutableSequence[float]] = None
+) -> MutableSequence[float]:
+    """Negate a buffer, as `negList` does for lists."""
+    return neg_buffer(xs, out)
+
+
+def addBuffers(
+    xs: Sequence[float],
+    ys: Sequence[float],
+    out: Optional[MutableSequence[float]] = None,
+) -> MutableSequence[float]:
+    """Add two buffers together, as `addLists` does for lists."""
+    return add_buffer(xs, ys, out)
+
+
+def sumBuffer(xs: Iterable[float]) -> float:
+    """Sum a buffer."""
+    return math.fsum(_items(xs))
+
+
+def prodBuffer(xs: Iterable[float]) -> float:
+    """Take the product of a buffer."""
+    return math.prod(_items(xs))
+
+
+# ## Fused kernels
+
+# A chain of operators such as `log(sigmoid(relu(a * 10 + 7)))` run with
+# the bulk operators makes one pass, and one temporary buffer, per
+# operator. `fuse` instead traces the chain once on a `TracedValue` and
+# generates a single loop computing the whole expression per element
+# with the prelude functions, along with a backward loop built from
+# `log_back`, `inv_back` and `relu_back`.
+#
+# Traced values support `+`, `-`, `*`, `/` with constants and with each
+# other, and the methods `neg`, `relu`, `sigmoid`, `log`, `exp` and `inv`,
+# the same spelling used by `MathTestVariable`.
+
+_NUMBER = (int, float)
+
+
+class TracedValue:
+    """Placeholder recording the operators applied to a fused kernel's input."""
+
+    __slots__ = ("op", "args", "index", "tape")
+
+    def __init__(self, op: str, args: Tuple[Any, ...], tape: List[TracedValue]) -> None:
+        self.op = op
+        self.args = args
+        self.tape = tape
+        self.index = len(tape)
+        tape.append(self)
+
+    def _binary(self, op: str, a: Any, b: Any) -> Any:
+        for v in (a, b):
+            if not isinstance(v, (TracedValue,) + _NUMBER):
+                return NotImplemented
+        return TracedValue(op, (a, b), self.tape)
+
+    def __add__(self, b: Any) -> Any:
+        return self._binary("add", self, b)
+
+    def __radd__(self, b: Any) -> Any:
+        return self._binary("add", b, self)
+
+    def __sub__(self, b: Any) -> Any:
+        return self._binary("sub", self, b)
+
+    def __rsub__(self, b: Any) -> Any:
+        return self._binary("sub", b, self)
+
+    def __mul__(self, b: Any) -> Any:
+        return self._binary("mul", self, b)
+
+    def __rmul__(self, b: Any) -> Any:
+        return self._binary("mul", b, self)
+
+    def __truediv__(self, b: Any) -> Any:
+        return self._binary("div", self, b)
+
+    def __rtruediv__(self, b: Any) -> Any:
+        return self._binary("div", b, self)
+
+    def __neg__(self) -> TracedValue:
+        return self.neg()
+
+    def neg(self) -> TracedValue:
+        """Trace `neg`."""
+        return TracedValue("neg", (self,), self.tape)
+
+    def relu(self) -> TracedValue:
+        """Trace `relu`."""
+        return TracedValue("relu", (self,), self.tape)
+
+    def sigmoid(self) -> TracedValue:
+        """Trace `sigmoid`."""
+        return TracedValue("sigmoid", (self,), self.tape)
+
+    def log(self) -> TracedValue:
+        """Trace `log`."""
+        return TracedValue("log", (self,), self.tape)
+
+    def exp(self) -> TracedValue:
+        """Trace `exp`."""
+        return TracedValue("exp", (self,), self.tape)
+
+    def inv(self) -> TracedValue:
+        """Trace `inv`."""
+        return TracedValue("inv", (self,), self.tape)
+
+
+def _operand(v: Any) -> str:
+    if isinstance(v, TracedValue):
+        return f"t{v.index}"
+    v = float(v)
+    # The `repr` of these, `inf` and `nan`, are not literals: use the
+    # names `_compile` binds.
+    if math.isnan(v):
+        return "_nan"
+    if math.isinf(v):
+        return "_inf" if v > 0 else "(-_inf)"
+    return repr(v)
+
+
+_FORWARD = {
+    "add": "{0} + {1}",
+    "sub": "{0} - {1}",
+    "mul": "{0} * {1}",
+    "div": "{0} / {1}",
+    "neg": "neg({0})",
+    "relu": "relu({0})",
+    "sigmoid": "sigmoid({0})",
+    "log": "log({0})",
+    "exp": "exp({0})",
+    "inv": "inv({0})",
+}
+
+# Derivative of each operator with respect to each argument, given the
+# upstream derivative `{g}` and the node's own output `{t}`.
+_BACKWARD = {
+    "add": ("{g}", "{g}"),
+    "sub": ("{g}", "-{g}"),
+    "mul": ("{g} * {1}", "{g} * {0}"),
+    "div": ("{g} / {1}", "-{g} * {0} / ({1} * {1})"),
+    "neg": ("-{g}",),
+    "relu": ("relu_back({0}, {g})",),
+    "sigmoid": ("{g} * {t} * (1.0 - {t})",),
+    "log": ("log_back({0}, {g})",),
+    "exp": ("{g} * {t}",),
+    "inv": ("inv_back({0}, {g})",),
+}
+
+
+_PRELUDE_CALLS = (
+    "neg",
+    "relu",
+    "sigmoid",
+    "log",
+    "exp",
+    "inv",
+    "relu_back",
+    "log_back",
+    "inv_back",
+)
+
+
+def _forward_lines(tape: List[TracedValue]) -> List[str]:
+    lines = []
+    for node in tape[1:]:
+        expr = _FORWARD[node.op].format(*[_operand(a) for a in node.args])
+        lines.append(f"t{node.index} = {expr}")
+    return lines
+
+
+def _backward_lines(tape: List[TracedValue], result: TracedValue) -> List[str]:
+    lines = [f"g{result.index} = d"]
+    seen = {result.index}
+    for node in reversed(tape[1:]):
+        if node.index not in seen:
+            continue
+        args = [_operand(a) for a in node.args]
+        for arg, rule in zip(node.args, _BACKWARD[node.op]):
+            if not isinstance(arg, TracedValue):
+                continue
+            expr = rule.format(*args, g=f"g{node.index}", t=f"t{node.index}")
+            if arg.index in seen:
+                lines.append(f"g{arg.index} = g{arg.index} + ({expr})")
+            else:
+                lines.append(f"g{arg.index} = {expr}")
+                seen.add(arg.index)
+    return lines
+
+
+def _source(
+    name: str, params: str, target: str, source: str, body: List[str], result: str
+) -> str:
+    lines = [f"def {name}({params}):", f"    for {target} in {source}:"]
+    lines += ["        " + line for line in body]
+    lines.append(f"        yield {result}")
+    return "\n".join(lines) + "\n"
+
+
+def _compile(name: str, source: str) -> Callable[..., Iterator[float]]:
+    # Bind the prelude functions the loop calls, and only those, so a
+    # kernel works as soon as the prelude it uses is implemented.
+    env: Dict[str, Any] = {
+        fn: _prelude(fn) for fn in _PRELUDE_CALLS if f"{fn}(" in source
+    }
+    env.update(_inf=math.inf, _nan=math.nan)
+    exec(compile(source, f"<fused {name}>", "exec"), env)
+    return env[name]
+
+
+class FusedKernel:
+    """A chain of operators compiled into a single pass over a buffer.
+
+    Built with `fuse`. Calling the kernel applies the whole chain to each
+    element; `backward` applies the chain rule for the same chain.
+
+    Attributes
+    ----------
+        forward_source : Generated source of the forward loop.
+        backward_source : Generated source of the backward loop.
+
+    """
+
+    def __init__(self, tape: List[TracedValue], result: Any) -> None:
+        if not isinstance(result, TracedValue):
+            # The chain ignores its input: keep a node so both loops have one.
+            zero = TracedValue("mul", (tape[0], 0.0), tape)
+            result = TracedValue("add", (zero, result), tape)
+        used = tape[: result.index + 1]
+        self.forward_source = _source(
+            "forward", "xs", "t0", "xs", _forward_lines(used), f"t{result.index}"
+        )
+        self.backward_source = _source(
+            "backward",
+            "xs, ds",
+            "t0, d",
+            "zip(xs, ds)",
+            _forward_lines(used) + _backward_lines(used, result),
+            "g0",
+        )
+        self._forward = _compile("forward", self.forward_source)
+        self._backward = _compile("backward", self.backward_source)
+
+    def __call__(
+        self, xs: Sequence[float], out: Optional[MutableSequence[float]] = None
+    ) -> MutableSequence[float]:
+        """Apply the chain to each element of `xs`, writing into `out` if given."""
+        return _store(self._forward(_items(xs)), len(xs), out, xs)
+
+    def backward(
+        self,
+        xs: Sequence[float],
+        ds: Sequence[float],
+        out: Optional[MutableSequence[float]] = None,
+    ) -> MutableSequence[float]:
+        """Derivative of the chain at each of `xs`, scaled by `ds`.
+
+        Args:
+        ----
+            xs: Input buffer the forward pass was run on.
+            ds: Derivative of the output for each element.
+            out: Optional destination of the same length as `xs`.
+
+        Returns:
+        -------
+            `out`, or a new array holding the derivatives.
+
+        """
+        n = _check_sizes(xs, ds)
+        return _store(self._backward(_items(xs), _items(ds)), n, out, xs)
+
+
+def fuse(*fns: Callable[[Any], Any]) -> FusedKernel:
+    """Compile a chain of operators into a single-pass kernel.
+
+    Args:
+    ----
+        *fns: Functions of one value, built from the operators supported by
+            `TracedValue`. They are composed left to right, so
+            `fuse(f, g)` computes `g(f(x))`.
+
+    Returns:
+    -------
+        The compiled `FusedKernel`.
+
+    """
+    tape: List[TracedValue] = []
+    result: Any = TracedValue("input", (), tape)
+    for fn in fns:
+        result = fn(result)
+    return FusedKernel(tape, result)
@@ -0,0 +1,217 @@
+"""Time spent in each module of a module tree."""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from typing import IO, Any, Dict, List, Tuple, Union
+
+from .module import (
+    Module,
+    RemovableHandle,
+    register_module_forward_hook,
+    register_module_forward_pre_hook,
+)
+
+
+@dataclass
+class CallStats:
+    """Totals for one module path.
+
+    Attributes
+    ----------
+        count : Number of calls.
+        total : Seconds from entering to leaving `forward`.
+        self_time : `total` minus the time spent in nested module calls.
+
+    """
+
+    count: int = 0
+    total: float = 0.0
+    self_time: float = 0.0
+
+
+@dataclass
+class _Frame:
+    module: Module
+    path: str
+    start: int
+    children: int = 0
+
+
+class Profiler:
+    """Record the calls of every module while active.
+
+    Use as a context manager, or call `start` and `stop`. Each call is
+    attributed to the dotted path of the module: the class name of the
+    outermost module called, followed by the names the module was
+    registered under, as in `named_parameters`, e.g. `Network.layer1`.
+    Modules not registered on their caller are named by their class.
+    Calls that raise are recorded too, up to the point they raised.
+
+    No hooks are installed while the profiler is inactive, so it costs
+    nothing then.
+
+    Args:
+    ----
+        max_events: Most individual calls kept for `chrome_trace`. The
+            totals in `stats` always cover every call.
+
+    """
+
+    def __init__(self, max_events: int = 1_000_000) -> None:
+        self.stats: Dict[str, CallStats] = {}
+        self.events: List[Tuple[str, int, int, int]] = []
+        self.max_events = max_events
+        self._local = threading.local()
+        # Names of the modules called by each module, keyed weakly so a
+        # freed module's entries go with it.
+        self._names: weakref.WeakKeyDictionary[
+            Module, weakref.WeakKeyDictionary[Module, str]
+        ] = weakref.WeakKeyDictionary()
+        self._handles: List[RemovableHandle] = []
+        self._origin = time.perf_counter_ns()
+
+    def start(self) -> None:
+        """Begin recording."""
+        if not self._handles:
+            self._handles = [
+                register_module_forward_pre_hook(self._enter),
+                register_module_forward_hook(self._leave, always_call=True),
+            ]
+
+    def stop(self) -> None:
+        """Stop recording. The results so far are kept."""
+        for handle in self._handles:
+            handle.remove()
+        self._handles = []
+
+    def __enter__(self) -> Profiler:
+        self.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    def _stack(self) -> List[_Frame]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _name(self, parent: Module, module: Module) -> str:
+        names = self._names.get(parent)
+        if names is None:
+            names = self._names[parent] = weakref.WeakKeyDictionary()
+        name = names.get(module)
+        if name is None:
+            name = type(module).__name__
+            for k, child in parent.__dict__["_modules"].items():
+                if child is module:
+                    name = k
+                    break
+            names[module] = name
+        return name
+
+    def _enter(self, module: Module, args: Tuple) -> None:
+        stack = self._stack()
+        if stack:
+            path = stack[-1].path + "." + self._name(stack[-1].module, module)
+        else:
+            path = type(module).__name__
+        stack.append(_Frame(module, path, time.perf_counter_ns()))
+
+    def _leave(self, module: Module, args: Tuple, output: Any) -> None:
+        end = time.perf_counter_ns()
+        stack = self._stack()
+        # `_leave` is also called when `forward` raises, which may be
+        # before `_enter` ran for this call.
+        if not stack or stack[-1].module is not module:
+            return
+        frame = stack.pop()
+        elapsed = end - frame.start
+        if stack:
+            stack[-1].children += elapsed
+        stats = self.stats.get(frame.path)
+        if stats is None:
+            stats = self.stats[frame.path] = CallStats()
+        stats.count += 1
+        stats.total += elapsed / 1e9
+        stats.self_time += (elapsed - frame.children) / 1e9
+        if len(self.events) < self.max_events:
+            self.events.append(
+                (frame.path, frame.start, elapsed, threading.get_ident())
+            )
+
+    def table(self, sort: str = "total") -> str:
+        """The recorded totals as a text table.
+
+        Args:
+        ----
+            sort: Column to sort by, `"total"`, `"self_time"` or `"count"`.
+
+        Returns:
+        -------
+            One row per module path.
+
+        """
+        rows = sorted(
+            self.stats.items(), key=lambda kv: getattr(kv[1], sort), reverse=True
+        )
+        width = max([len("module")] + [len(path) for path in self.stats])
+        lines = [
+            f"{'module':{width}s} {'calls':>9s} {'total ms':>10s} {'self ms':>10s}"
+        ]
+        for path, s in rows:
+            lines.append(
+                f"{path:{width}s} {s.count:9d} {s.total * 1e3:10.3f} "
+                f"{s.self_time * 1e3:10.3f}"
+            )
+        return "\n".join(lines)
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """The recorded calls in the Chrome trace event format.
+
+        Load the saved JSON in `chrome://tracing` or Perfetto.
+
+        Returns
+        -------
+            A dict ready for `json.dump`.
+
+        """
+        events = [
+            {
+                "name": path,
+                "ph": "X",
+                "ts": (start - self._origin) / 1e3,
+                "dur": elapsed / 1e3,
+                "pid": 0,
+                "tid": tid,
+            }
+            for path, start, elapsed, tid in self.events
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def save_chrome_trace(self, f: Union[str, IO[str]]) -> None:
+        """Write `chrome_trace` as JSON to a path or an open text file."""
+        if isinstance(f, str):
+            with open(f, "w") as out:
+                json.dump(self.chrome_trace(), out)
+        else:
+            json.dump(self.chrome_trace(), f)
+
+    def folded(self) -> str:
+        """Self time per path in the folded stack format of flame graph tools.
+
+        Returns
+        -------
+            One `frame;frame;... microseconds` line per module path.
+
+        """
+        return "\n".join(
+            f"{path.replace('.', ';')} {round(s.self_time * 1e6)}"
+            for path, s in self.stats.items()
+        )
@@ -0,0 +1,49 @@
+"""
+Points per second of the dataset generators.
+
+>>> python project/bench_datasets.py --max 1e6
+"""
+
+import importlib.util
+import time
+from argparse import ArgumentParser
+
+import minitorch
+
+
+def rate(fn, N):
+    start = time.perf_counter()
+    fn(N)
+    return N / (time.perf_counter() - start)
+
+
+def bench_datasets(max_n):
+    backends = {
+        "lists": lambda name: minitorch.datasets[name],
+        "arrays": lambda name: lambda N: minitorch.generate_dataset(
+            name, N, use_numpy=False
+        ),
+    }
+    if importlib.util.find_spec("numpy") is not None:
+        backends["numpy"] = lambda name: lambda N: minitorch.generate_dataset(
+            name, N, use_numpy=True
+        )
+
+    sizes = []
+    N = 1000
+    while N <= max_n:
+        sizes.append(N)
+        N *= 10
+
+    print(f"{'dataset':8s} {'N':>10s} " + " ".join(f"{b:>12s}" for b in backends))
+    for name in minitorch.datasets:
+        for N in sizes:
+            rates = [rate(make(name), N) for make in backends.values()]
+            print(f"{name:8s} {N:10d} " + " ".join(f"{r:12.3g}" for r in rates))
+    print("(points per second)")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--max", type=float, default=1e7, help="largest N")
+    bench_datasets(int(parser.parse_args().max))
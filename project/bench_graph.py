@@ -0,0 +1,125 @@
+"""
+Benchmark of `GraphBuilder.run` on generated computation graphs.
+
+>>> python project/bench_graph.py --nodes 100000
+"""
+
+import argparse
+import random
+import time
+from dataclasses import dataclass, field
+
+import networkx as nx
+from graph_builder import GraphBuilder, Scalar
+
+
+def add(a, b):
+    return a + b
+
+
+@dataclass
+class History:
+    last_fn: object = None
+    inputs: tuple = ()
+
+
+@dataclass(eq=False)
+class Node(Scalar):
+    "Stand-in for a scalar with the interface `GraphBuilder` uses."
+
+    history: History = field(default_factory=History)
+
+    def is_constant(self):
+        return False
+
+    def is_leaf(self):
+        return not self.history.inputs
+
+
+def make_graph(nodes, width, seed=0):
+    """Layers of `width` nodes, each computed from two nodes of the layer
+    before, ending in a single output. Shared inputs make it diamond
+    shaped, so an unvisited traversal expands exponentially many paths."""
+    rng = random.Random(seed)
+    layer = [Node(f"x{i}") for i in range(width)]
+    made = width
+    while made + width < nodes:
+        layer = [
+            Node(f"n{made + i}", History(add, (rng.choice(layer), rng.choice(layer))))
+            for i in range(width)
+        ]
+        made += width
+    while len(layer) > 1:
+        pairs = zip(layer[::2], layer[1::2])
+        rest = layer[-1:] if len(layer) % 2 else []
+        layer = [
+            Node(f"r{made + i}", History(add, pair)) for i, pair in enumerate(pairs)
+        ] + rest
+        made += len(layer)
+    return layer[0], made
+
+
+def queue_run(builder, final, limit):
+    "The previous traversal: list queue, no visited set. Stops after `limit` ops."
+    queue = [[final]]
+    G = nx.MultiDiGraph()
+    G.add_node(builder.get_name(final))
+    while queue and builder.op_id < limit:
+        (cur,) = queue[0]
+        queue = queue[1:]
+        if cur.is_constant() or cur.is_leaf():
+            continue
+        op = "%s (Op %d)" % (cur.history.last_fn.__name__, builder.op_id)
+        G.add_node(op, shape="square", penwidth=3)
+        G.add_edge(op, builder.get_name(cur))
+        builder.op_id += 1
+        for i, input in enumerate(cur.history.inputs):
+            G.add_edge(builder.get_name(input), op, f"{i}")
+        for input in cur.history.inputs:
+            queue.append([input])
+    return G
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=100_000)
+    parser.add_argument("--width", type=int, default=100)
+    parser.add_argument(
+        "--old-limit",
+        type=int,
+        default=20_000,
+        help="ops the previous traversal may expand before it is stopped",
+    )
+    args = parser.parse_args()
+
+    final, n = make_graph(args.nodes, args.width)
+    print(f"Graph with {n} nodes, {args.width} wide")
+
+    t = time.perf_counter()
+    G = GraphBuilder().run(final)
+    elapsed = time.perf_counter() - t
+    print(
+        f"  run                    {elapsed:8.3f} s  "
+        f"{G.number_of_nodes()} nodes, {G.number_of_edges()} edges"
+    )
+
+    t = time.perf_counter()
+    G = GraphBuilder().run(final, max_depth=10, max_nodes=1000)
+    elapsed = time.perf_counter() - t
+    print(
+        f"  run, 10 deep, 1000 ops {elapsed:8.3f} s  "
+        f"{G.number_of_nodes()} nodes, {G.number_of_edges()} edges"
+    )
+
+    builder = GraphBuilder()
+    t = time.perf_counter()
+    G = queue_run(builder, final, args.old_limit)
+    elapsed = time.perf_counter() - t
+    print(
+        f"  previous traversal     {elapsed:8.3f} s  "
+        f"stopped after {builder.op_id} ops, {G.number_of_nodes()} nodes"
+    )
+
+
+if __name__ == "__main__":
+    main()
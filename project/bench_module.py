@@ -0,0 +1,147 @@
+"""
+Micro-benchmarks for `minitorch.Module`.
+
+>>> python project/bench_module.py
+"""
+
+import timeit
+import tracemalloc
+
+import minitorch
+
+
+class Leaf(minitorch.Module):
+    def __init__(self, size):
+        super().__init__()
+        for i in range(size):
+            self.add_parameter(f"p{i}", float(i))
+
+
+class Node(minitorch.Module):
+    def __init__(self, depth, width, size):
+        super().__init__()
+        for i in range(width):
+            child = Node(depth - 1, width, size) if depth > 1 else Leaf(size)
+            setattr(self, f"m{i}", child)
+
+
+def walk_named_parameters(module, prefix=""):
+    "Uncached traversal, rebuilding every dotted name on each call."
+    out = [(prefix + k, p) for k, p in module.__dict__["_parameters"].items()]
+    for name, child in module.__dict__["_modules"].items():
+        out.extend(walk_named_parameters(child, prefix + name + "."))
+    return out
+
+
+def bench_named_parameters(depth=4, width=10, size=1, number=20):
+    # width ** depth leaves of `size` parameters: 10k with the defaults.
+    model = Node(depth, width, size)
+    n = len(model.parameters())
+    walk = timeit.timeit(lambda: walk_named_parameters(model), number=number)
+    cached = timeit.timeit(lambda: model.named_parameters(), number=number)
+
+    def rebuild():
+        model.m0._invalidate()
+        model.named_parameters()
+
+    rebuilt = timeit.timeit(rebuild, number=number)
+    print(f"named_parameters, {n} parameters, per call:")
+    print(f"  tree walk         {walk / number * 1e6:12.1f} us")
+    print(f"  cached            {cached / number * 1e6:12.1f} us")
+    print(f"  after one change  {rebuilt / number * 1e6:12.1f} us")
+
+
+class DictParameter:
+    "Parameter laid out with an instance dict, for comparison."
+
+    def __init__(self, x, name=None):
+        self.value = x
+        self.name = name
+
+
+def module_allocated(make, n, register):
+    """Bytes per parameter of a `Module` holding `n` scalar parameters.
+
+    With `register` the parameters are set as attributes, as models do,
+    so they are kept in both `_parameters` and the instance dict.
+    Otherwise they are only put in `_parameters`, as before. The names and
+    values are created first and not counted.
+    """
+    names = [f"p{i}" for i in range(n)]
+    values = [float(i) for i in range(n)]
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    model = minitorch.Module()
+    params = model.__dict__["_parameters"]
+    for k, v in zip(names, values):
+        if register:
+            setattr(model, k, make(v, k))
+        else:
+            params[k] = make(v, k)
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del model
+    return size / n
+
+
+def bench_parameters(n=100_000, number=1_000_000):
+    model = minitorch.Module()
+    for i in range(n):
+        setattr(model, f"p{i}", minitorch.Parameter(float(i)))
+    last = f"p{n - 1}"
+    p = getattr(model, last)
+    old = DictParameter(float(n))
+
+    # The previous layout: parameters only in `_parameters`, so reading
+    # one misses the instance dict and falls back to `__getattr__`.
+    old_model = minitorch.Module()
+    for i in range(n):
+        setattr(old_model, f"p{i}", minitorch.Parameter(float(i)))
+        del old_model.__dict__[f"p{i}"]
+
+    print(f"Module with {n} scalar parameters:")
+    fallback = timeit.timeit(lambda: getattr(old_model, last), number=number)
+    direct = timeit.timeit(lambda: getattr(model, last), number=number)
+    print(f"  module.{last} via __getattr__  {fallback / number * 1e9:8.1f} ns")
+    print(f"  module.{last} direct           {direct / number * 1e9:8.1f} ns")
+    old_value = timeit.timeit(lambda: old.value, number=number)
+    new_value = timeit.timeit(lambda: p.value, number=number)
+    print(f"  parameter.value, dict          {old_value / number * 1e9:8.1f} ns")
+    print(f"  parameter.value, slots         {new_value / number * 1e9:8.1f} ns")
+
+    # Measured with tracemalloc rather than `sys.getsizeof`, which would
+    # create the lazily allocated instance dict it is asked about.
+    print("  memory per parameter of the populated module:")
+    before = module_allocated(DictParameter, n, register=False)
+    slots = module_allocated(minitorch.Parameter, n, register=False)
+    now = module_allocated(minitorch.Parameter, n, register=True)
+    rows = [
+        ("dict, in _parameters", before),
+        ("slots, in _parameters", slots),
+        ("slots, also in the instance dict", now),
+    ]
+    for label, size in rows:
+        print(f"    {label:34s} {size:8.1f} B")
+
+
+def bench_update(n=2000, number=200):
+    "One SGD-style step through `Parameter.update`, as the training loops do."
+    model = Leaf(n)
+    params = model.parameters()
+
+    def step():
+        for p in params:
+            p.update(p.value - 0.1)
+
+    print(f"Parameter.update over {n} parameters, per parameter:")
+    unwatched = timeit.timeit(step, number=number)
+    print(f"  no CachedModule         {unwatched / number / n * 1e9:8.1f} ns")
+    minitorch.CachedModule(model)
+    watched = timeit.timeit(step, number=number)
+    print(f"  wrapped in CachedModule {watched / number / n * 1e9:8.1f} ns")
+
+
+if __name__ == "__main__":
+    bench_named_parameters()
+    bench_parameters()
+    bench_update()
@@ -0,0 +1,263 @@
+"""
+Time and allocations of the operators in `minitorch.operators`.
+
+Times every prelude function on scalars, and the higher-order functions,
+the list functions and their bulk counterparts over 1e2 to 1e6 elements.
+The bulk operators run on `array('d')` buffers, on NumPy arrays
+(`[ndarray]`) and without NumPy (`[python]`). Functions not implemented
+yet are listed as skipped.
+
+>>> python project/bench_operators.py --save bench.json
+>>> python project/bench_operators.py --baseline bench.json
+"""
+
+import json
+import operator
+import platform
+import random
+import statistics
+import sys
+import timeit
+import tracemalloc
+from argparse import ArgumentParser
+from array import array
+from contextlib import contextmanager
+
+from minitorch import operators as ops
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Prelude functions and the arguments to call them with. The values are
+# inside every function's domain.
+SCALAR = {
+    "mul": (0.5, 1.5),
+    "id": (0.5,),
+    "add": (0.5, 1.5),
+    "neg": (0.5,),
+    "lt": (0.5, 1.5),
+    "eq": (0.5, 1.5),
+    "max": (0.5, 1.5),
+    "is_close": (0.5, 1.5),
+    "sigmoid": (0.5,),
+    "relu": (0.5,),
+    "log": (0.5,),
+    "exp": (0.5,),
+    "log_back": (0.5, 1.5),
+    "inv": (0.5,),
+    "inv_back": (0.5, 1.5),
+    "relu_back": (0.5, 1.5),
+}
+
+
+# Functions over sequences: the operators each one needs, and how to call
+# it on two sequences of equal length.
+LISTS = {
+    "map(neg)": (("map", "neg"), lambda xs, ys: ops.map(ops.neg)(xs)),
+    "zipWith(add)": (("zipWith", "add"), lambda xs, ys: ops.zipWith(ops.add)(xs, ys)),
+    "reduce(add)": (("reduce", "add"), lambda xs, ys: ops.reduce(ops.add, 0.0)(xs)),
+    "negList": (("negList",), lambda xs, ys: ops.negList(xs)),
+    "addLists": (("addLists",), lambda xs, ys: ops.addLists(xs, ys)),
+    "sum": (("sum",), lambda xs, ys: ops.sum(xs)),
+    "prod": (("prod",), lambda xs, ys: ops.prod(xs)),
+}
+
+# Bulk counterparts, run on `array('d')` buffers.
+BUFFERS = {
+    "mapBuffer(neg)": lambda xs, ys: ops.mapBuffer(operator.neg, xs),
+    "zipWithBuffer(add)": lambda xs, ys: ops.zipWithBuffer(operator.add, xs, ys),
+    "reduceBuffer(add)": lambda xs, ys: ops.reduceBuffer(operator.add, 0.0, xs),
+    "negBuffer": lambda xs, ys: ops.negBuffer(xs),
+    "addBuffers": lambda xs, ys: ops.addBuffers(xs, ys),
+    "sumBuffer": lambda xs, ys: ops.sumBuffer(xs),
+    "prodBuffer": lambda xs, ys: ops.prodBuffer(xs),
+    "mul_buffer": lambda xs, ys: ops.mul_buffer(xs, ys),
+    "add_buffer": lambda xs, ys: ops.add_buffer(xs, ys),
+    "neg_buffer": lambda xs, ys: ops.neg_buffer(xs),
+    "sigmoid_buffer": lambda xs, ys: ops.sigmoid_buffer(xs),
+    "relu_buffer": lambda xs, ys: ops.relu_buffer(xs),
+    "log_buffer": lambda xs, ys: ops.log_buffer(xs),
+    "exp_buffer": lambda xs, ys: ops.exp_buffer(xs),
+    "inv_buffer": lambda xs, ys: ops.inv_buffer(xs),
+    "log_back_buffer": lambda xs, ys: ops.log_back_buffer(xs, ys),
+    "inv_back_buffer": lambda xs, ys: ops.inv_back_buffer(xs, ys),
+    "relu_back_buffer": lambda xs, ys: ops.relu_back_buffer(xs, ys),
+}
+
+
+def implemented(*names):
+    return all(hasattr(ops, name) for name in names)
+
+
+@contextmanager
+def without_numpy():
+    "Run the bulk operators on their pure Python path."
+    saved, ops.np = ops.np, None
+    try:
+        yield
+    finally:
+        ops.np = saved
+
+
+def time_call(fn, repeat):
+    """Best time of one call to `fn`, in seconds, and the spread of the
+    repeats: how far their median is above the best, as a fraction."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    times = timer.repeat(repeat, number)
+    best = min(times)
+    return best / number, statistics.median(times) / best - 1
+
+
+def allocated(fn):
+    "Peak bytes allocated during one call to `fn`."
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(sizes, repeat):
+    results = []
+    skipped = []
+
+    def record(name, n, timing, nbytes):
+        seconds, spread = timing
+        results.append(
+            {
+                "name": name,
+                "n": n,
+                "ns_per_element": seconds / n * 1e9,
+                "spread": spread,
+                "alloc_bytes": nbytes,
+            }
+        )
+        print(
+            f"{name:32s} {n:>9d} {seconds / n * 1e9:12.1f} {spread:+8.1%} "
+            f"{nbytes / n:12.1f}"
+        )
+
+    print(
+        f"{'operator':32s} {'n':>9s} {'ns/element':>12s} {'spread':>8s} "
+        f"{'bytes/elem':>12s}"
+    )
+    for name, args in SCALAR.items():
+        if not implemented(name):
+            skipped.append(name)
+            continue
+        call = (lambda fn, args: lambda: fn(*args))(getattr(ops, name), args)
+        record(name, 1, time_call(call, repeat), allocated(call))
+
+    rng = random.Random(0)
+    for name, (needs, _) in LISTS.items():
+        if not implemented(*needs):
+            skipped.append(name)
+    for n in sizes:
+        ls = [rng.uniform(0.5, 1.5) for _ in range(n)]
+        ls2 = [rng.uniform(0.5, 1.5) for _ in range(n)]
+        xs, ys = array("d", ls), array("d", ls2)
+        for name, (_, fn) in LISTS.items():
+            if name not in skipped:
+                call = (lambda fn: lambda: fn(ls, ls2))(fn)
+                record(name, n, time_call(call, repeat), allocated(call))
+        backends = [("", xs, ys)]
+        if np is not None:
+            backends.append((" [ndarray]", np.array(ls), np.array(ls2)))
+        for suffix, a, b in backends:
+            for name, fn in BUFFERS.items():
+                call = (lambda fn: lambda: fn(a, b))(fn)
+                record(name + suffix, n, time_call(call, repeat), allocated(call))
+        with without_numpy():
+            for name, fn in BUFFERS.items():
+                call = (lambda fn: lambda: fn(xs, ys))(fn)
+                try:
+                    call()
+                except NotImplementedError:
+                    # Calls a prelude function not implemented yet.
+                    if name + " [python]" not in skipped:
+                        skipped.append(name + " [python]")
+                    continue
+                record(name + " [python]", n, time_call(call, repeat), allocated(call))
+    if skipped:
+        print(f"skipped, not implemented: {', '.join(skipped)}")
+    return results
+
+
+def compare(results, baseline, tolerance, min_size):
+    """Print the change against `baseline`. Returns the regressions.
+
+    A slowdown counts as a regression if it is over `tolerance` and over
+    the noise floor, three times the larger spread of the two
+    measurements. Sizes under `min_size`, which includes the scalar
+    functions, are shown but never counted: the interpreter's overhead
+    varies too much from run to run to time them reliably.
+    """
+    old = {(r["name"], r["n"]): r for r in baseline["results"]}
+    regressions = []
+    print(f"\n{'operator':32s} {'n':>9s} {'baseline':>10s} {'now':>10s} {'change':>8s}")
+    for r in results:
+        b = old.get((r["name"], r["n"]))
+        if b is None:
+            continue
+        change = r["ns_per_element"] / b["ns_per_element"] - 1
+        noise = 3 * max(r.get("spread", 0.0), b.get("spread", 0.0))
+        flag = ""
+        if r["n"] < min_size:
+            flag = "  (not gated)"
+        elif change > max(tolerance, noise):
+            flag = "  REGRESSION"
+            regressions.append(r)
+        print(
+            f"{r['name']:32s} {r['n']:>9d} {b['ns_per_element']:10.1f} "
+            f"{r['ns_per_element']:10.1f} {change:+8.1%}{flag}"
+        )
+    return regressions
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        default="1e2,1e3,1e4,1e5,1e6",
+        help="comma separated list lengths",
+    )
+    parser.add_argument("--repeat", type=int, default=7, help="best of this many")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="JSON file of earlier results")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="slowdown against the baseline counted as a regression",
+    )
+    parser.add_argument(
+        "--min-size",
+        type=float,
+        default=1e4,
+        help="smallest list length compared against the baseline",
+    )
+    args = parser.parse_args()
+    sizes = [int(float(s)) for s in args.sizes.split(",")]
+
+    results = run(sizes, args.repeat)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(
+                {"python": platform.python_version(), "results": results}, f, indent=1
+            )
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(
+                results, json.load(f), args.tolerance, int(args.min_size)
+            )
+        if regressions:
+            print(f"{len(regressions)} regressions over {args.tolerance:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
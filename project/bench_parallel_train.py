@@ -0,0 +1,48 @@
+"""
+Epoch time of `TorchTrain.train` against the number of worker processes.
+
+>>> python project/bench_parallel_train.py --points 100000 --workers 1 2 4 8
+"""
+
+import time
+from argparse import ArgumentParser
+
+import minitorch
+from run_torch import TorchTrain
+
+
+def bench_workers(name, points, hidden, epochs, workers):
+    data = minitorch.generate_dataset(name, points, seed=0)
+    stamps = []
+
+    def log_fn(epoch, total_loss, correct, losses):
+        stamps.append((epoch, time.perf_counter()))
+
+    start = time.perf_counter()
+    TorchTrain(hidden).train(data, 0.5, epochs, log_fn, workers=workers)
+    (e0, t0), (e1, t1) = stamps[0], stamps[-1]
+    if e1 == e0:
+        # Under 10 epochs only the last is logged: startup is not separable.
+        return (t1 - start) / e1, None
+    per_epoch = (t1 - t0) / (e1 - e0)
+    # Everything before the first 10 epochs is process startup.
+    startup = t0 - start - e0 * per_epoch
+    return per_epoch, startup
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--points", type=int, default=100_000)
+    parser.add_argument("--hidden", type=int, default=10)
+    parser.add_argument("--epochs", type=int, default=30)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    print(f"{'dataset':8s} {'workers':>8s} {'epoch (ms)':>12s} {'startup (s)':>12s}")
+    for name in ["Xor", "Spiral"]:
+        for workers in args.workers:
+            per_epoch, startup = bench_workers(
+                name, args.points, args.hidden, args.epochs, workers
+            )
+            startup = "-" if startup is None else f"{startup:.2f}"
+            print(f"{name:8s} {workers:8d} {per_epoch * 1e3:12.2f} {startup:>12s}")
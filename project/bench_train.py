@@ -0,0 +1,180 @@
+"""
+Training throughput of `ManualTrain` and `TorchTrain`, without Streamlit.
+
+For every front-end, dataset, number of points and hidden size, measures
+the latency of `run_one`, the points per second of `run_many`, the time
+per epoch and points per second of `train`, and the peak RSS. Each
+configuration runs in its own process so the peak RSS is its own.
+`ManualTrain` has no `train` and a fixed model, so it is only measured
+once per dataset and size, forward only.
+
+>>> python project/bench_train.py --points 100 1000 --hidden 2 10 --json train.json
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from argparse import SUPPRESS, ArgumentParser
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import minitorch
+
+FRONT_ENDS = ["manual", "torch"]
+
+
+def load(front_end):
+    if front_end == "manual":
+        from run_manual import ManualTrain
+
+        return ManualTrain
+    from run_torch import TorchTrain
+
+    return TorchTrain
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere.
+    return rss / 2**20 if sys.platform == "darwin" else rss / 2**10
+
+
+def measure(front_end, dataset, points, hidden, epochs, rate):
+    "Run one configuration in this process and return its measurements."
+    data = minitorch.generate_dataset(dataset, points, seed=0)
+    X = list(data.X)
+    train = load(front_end)(hidden)
+
+    samples = []
+    for x in X[:100]:
+        start = time.perf_counter()
+        train.run_one(x)
+        samples.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    train.run_many(X)
+    forward = time.perf_counter() - start
+
+    result = {
+        "front_end": front_end,
+        "dataset": dataset,
+        "points": points,
+        "hidden": hidden,
+        "forward_us": statistics.median(samples) * 1e6,
+        "forward_points_s": points / forward,
+        "epoch_ms": None,
+        "train_points_s": None,
+    }
+    if hasattr(train, "train"):
+        stamps = []
+
+        def log_fn(epoch, total_loss, correct, losses):
+            stamps.append((epoch, time.perf_counter()))
+
+        start = time.perf_counter()
+        train.train(data, rate, epochs, log_fn)
+        (e0, t0), (e1, t1) = stamps[0], stamps[-1]
+        # `train` logs every 10 epochs and the last one. Time from the
+        # first log when there are two, else from the start.
+        if e1 > e0:
+            per_epoch = (t1 - t0) / (e1 - e0)
+        else:
+            per_epoch = (t1 - start) / max(1, e1)
+        result["epoch_ms"] = per_epoch * 1e3
+        result["train_points_s"] = points / per_epoch
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def run_isolated(front_end, dataset, points, hidden, epochs, rate):
+    "Run `measure` in a fresh interpreter."
+    cmd = [
+        sys.executable,
+        os.path.abspath(__file__),
+        "--one",
+        front_end,
+        dataset,
+        str(points),
+        str(hidden),
+        "--epochs",
+        str(epochs),
+        "--rate",
+        str(rate),
+    ]
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode:
+        # E.g. a prelude function the model needs is not implemented yet.
+        lines = proc.stderr.strip().splitlines()
+        return {"error": lines[-1] if lines else f"exit {proc.returncode}"}
+    return json.loads(proc.stdout.splitlines()[-1])
+
+
+def _fmt(value, spec):
+    return f"{'-':>{spec.split('.')[0]}s}" if value is None else f"{value:{spec}}"
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--front-ends", nargs="+", default=FRONT_ENDS)
+    parser.add_argument("--datasets", nargs="+", default=list(minitorch.datasets))
+    parser.add_argument("--points", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--hidden", type=int, nargs="+", default=[2, 10, 50])
+    parser.add_argument("--epochs", type=int, default=20)
+    parser.add_argument("--rate", type=float, default=0.5, help="learning rate")
+    parser.add_argument("--json", help="write the results to this JSON file")
+    parser.add_argument("--one", nargs=4, help=SUPPRESS)
+    args = parser.parse_args()
+
+    if args.one:
+        front_end, dataset, points, hidden = args.one
+        result = measure(
+            front_end, dataset, int(points), int(hidden), args.epochs, args.rate
+        )
+        print(json.dumps(result))
+        return
+
+    print(
+        f"{'front-end':9s} {'dataset':8s} {'points':>7s} {'hidden':>6s} "
+        f"{'run_one us':>10s} {'fwd pts/s':>10s} {'epoch ms':>9s} "
+        f"{'train pts/s':>11s} {'RSS MB':>7s}"
+    )
+    results = []
+    for front_end in args.front_ends:
+        # ManualTrain's model does not depend on the hidden size.
+        hidden_sizes = args.hidden if front_end != "manual" else args.hidden[:1]
+        for dataset in args.datasets:
+            for points in args.points:
+                for hidden in hidden_sizes:
+                    r = run_isolated(
+                        front_end, dataset, points, hidden, args.epochs, args.rate
+                    )
+                    row = (
+                        f"{front_end:9s} {dataset:8s} {points:7d} "
+                        f"{hidden if front_end != 'manual' else '-':>6} "
+                    )
+                    if "error" in r:
+                        print(f"{row}failed: {r['error']}", flush=True)
+                        continue
+                    results.append(r)
+                    print(
+                        f"{row}{r['forward_us']:10.1f} {r['forward_points_s']:10.3g} "
+                        f"{_fmt(r['epoch_ms'], '9.2f')} "
+                        f"{_fmt(r['train_points_s'], '11.3g')} "
+                        f"{_fmt(r['peak_rss_mb'], '7.1f')}",
+                        flush=True,
+                    )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
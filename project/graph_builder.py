@@ -1,4 +1,6 @@
+import hashlib
 import networkx as nx
+from collections import OrderedDict, deque
 from dataclasses import dataclass
 import minitorch
 
@@ -11,6 +13,11 @@ else:
         name: str
 
 
+# Types of the values that have a history to draw. Tensors only exist in
+# later modules.
+VARIABLES = (Scalar,) + ((minitorch.Tensor,) if hasattr(minitorch, "Tensor") else ())
+
+
 def build_expression(code):
     out = eval(
         code,
@@ -46,7 +53,7 @@ class GraphBuilder:
         self.intermediates = {}
 
     def get_name(self, x):
-        if not isinstance(x, Scalar) and not isinstance(x, minitorch.Tensor):
+        if not isinstance(x, VARIABLES):
             return "constant %s" % (x,)
         elif len(x.name) > 15:
             if x.name in self.intermediates:
@@ -58,30 +65,185 @@ class GraphBuilder:
         else:
             return x.name
 
-    def run(self, final):
-        queue = [[final]]
+    def run(self, final, max_depth=None, max_nodes=None):
+        """Graph of the ops that computed `final`.
 
+        Variables are visited breadth-first and each one is expanded only
+        once, so a value used by several ops gets a single op node.
+        `max_depth` limits how many ops back from `final` are drawn and
+        `max_nodes` how many ops are drawn in total.
+        """
         G = nx.MultiDiGraph()
         G.add_node(self.get_name(final))
 
+        queue = deque([(final, 0)])
+        seen = {id(final)}
+        ops = 0
         while queue:
-            (cur,) = queue[0]
-            queue = queue[1:]
-
+            cur, depth = queue.popleft()
             if cur.is_constant() or cur.is_leaf():
                 continue
-            else:
-                op = "%s (Op %d)" % (cur.history.last_fn.__name__, self.op_id)
-                G.add_node(op, shape="square", penwidth=3)
-                G.add_edge(op, self.get_name(cur))
-                self.op_id += 1
-                for i, input in enumerate(cur.history.inputs):
-                    G.add_edge(self.get_name(input), op, f"{i}")
-
-                for input in cur.history.inputs:
-                    if not isinstance(input, Scalar) and not isinstance(
-                        input, minitorch.Tensor
-                    ):
-                        continue
-                    queue.append([input])
+            if max_depth is not None and depth >= max_depth:
+                continue
+            if max_nodes is not None and ops >= max_nodes:
+                break
+            ops += 1
+
+            op = "%s (Op %d)" % (cur.history.last_fn.__name__, self.op_id)
+            G.add_node(op, shape="square", penwidth=3)
+            G.add_edge(op, self.get_name(cur))
+            self.op_id += 1
+            for i, input in enumerate(cur.history.inputs):
+                G.add_edge(self.get_name(input), op, f"{i}")
+                if isinstance(input, VARIABLES) and id(input) not in seen:
+                    seen.add(id(input))
+                    queue.append((input, depth + 1))
         return G
+
+
+def _quote(x):
+    return '"%s"' % (str(x).replace("\\", "\\\\").replace('"', '\\"'),)
+
+
+def _attrs(attrs):
+    if not attrs:
+        return ""
+    return " [%s]" % (", ".join(f"{k}={_quote(v)}" for k, v in attrs.items()),)
+
+
+def to_dot(G):
+    "The DOT source of `G`, as accepted by `st.graphviz_chart`."
+    lines = ["digraph {" if G.is_directed() else "graph {"]
+    for kind in ("graph", "node", "edge"):
+        if G.graph.get(kind):
+            lines.append(f"{kind}{_attrs(G.graph[kind])};")
+    for n, attrs in G.nodes(data=True):
+        lines.append(f"{_quote(n)}{_attrs(attrs)};")
+    arrow = " -> " if G.is_directed() else " -- "
+    for u, v, attrs in G.edges(data=True):
+        lines.append(f"{_quote(u)}{arrow}{_quote(v)}{_attrs(attrs)};")
+    lines.append("}")
+    return "\n".join(lines)
+
+
+def structure_hash(G):
+    "Hash of the nodes, edges and attributes of `G`, in insertion order."
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr(G.graph).encode())
+    for n, attrs in G.nodes(data=True):
+        h.update(repr((n, sorted(attrs.items()))).encode())
+    for u, v, attrs in G.edges(data=True):
+        h.update(repr((u, v, sorted(attrs.items()))).encode())
+    return h.hexdigest()
+
+
+def _fn_name(op):
+    return op.rsplit(" (Op ", 1)[0]
+
+
+def collapse_repeats(G, min_ops=2):
+    """Copy of a `GraphBuilder` graph with repeated blocks drawn as one node.
+
+    A block is the ops computing a value that is used more than once, or
+    the final output, back to the values it shares with the rest of the
+    graph. Blocks with at least `min_ops` ops and the same structure, such
+    as the units of a `Linear` layer, are all drawn in full only once;
+    every other copy becomes a single node.
+    """
+    ops = {n for n, shape in G.nodes(data="shape") if shape == "square"}
+
+    def producer(v):
+        for u in G.predecessors(v):
+            if u in ops:
+                return u
+        return None
+
+    def shared(v):
+        return len(set(G.successors(v))) != 1
+
+    def inputs(op):
+        edges = sorted(G.in_edges(op, keys=True), key=lambda e: e[2])
+        return [u for u, _, _ in edges]
+
+    # The signature of an op's block. Shared values are the block's inputs;
+    # unshared leaves belong to it.
+    signatures = {}
+    members = {}
+
+    def block(op):
+        if op in signatures:
+            return
+        stack = [(op, False)]
+        while stack:
+            cur, ready = stack.pop()
+            if not ready:
+                stack.append((cur, True))
+                for u in inputs(cur):
+                    p = producer(u)
+                    if p is not None and not shared(u) and p not in signatures:
+                        stack.append((p, False))
+                continue
+            sig, inner, outer = [_fn_name(cur)], {cur}, set()
+            for u in inputs(cur):
+                p = producer(u)
+                if shared(u):
+                    sig.append("in")
+                    outer.add(u)
+                elif p is None:
+                    sig.append("leaf")
+                    inner.add(u)
+                else:
+                    sig.append(signatures[p])
+                    inner |= members[p][0] | {u}
+                    outer |= members[p][1]
+            signatures[cur] = hash(tuple(sig))
+            members[cur] = (inner, outer)
+
+    groups = {}
+    for v in G.nodes:
+        if v in ops or not shared(v):
+            continue
+        op = producer(v)
+        if op is None:
+            continue
+        block(op)
+        inner, outer = members[op]
+        if sum(1 for n in inner if n in ops) >= min_ops:
+            groups.setdefault(signatures[op], []).append((v, op))
+
+    H = G.copy()
+    for roots in groups.values():
+        if len(roots) < 2:
+            continue
+        first = roots[0][0]
+        for v, op in roots[1:]:
+            inner, outer = members[op]
+            count = sum(1 for n in inner if n in ops)
+            H.remove_nodes_from(inner)
+            summary = f"{_fn_name(op)} block like {first} ({count} ops) -> {v}"
+            H.add_node(summary, shape="box3d")
+            for u in outer:
+                H.add_edge(u, summary)
+            H.add_edge(summary, v)
+    return H
+
+
+_dot_cache = OrderedDict()
+DOT_CACHE_SIZE = 32
+
+
+def render_dot(G, collapse=False):
+    """DOT source of `G`, optionally with `collapse_repeats` applied.
+
+    Results are cached by `structure_hash`, so graphs with the same
+    structure, e.g. from models of the same size, are only rendered once.
+    """
+    key = (structure_hash(G), collapse)
+    if key in _dot_cache:
+        _dot_cache.move_to_end(key)
+        return _dot_cache[key]
+    dot = to_dot(collapse_repeats(G) if collapse else G)
+    _dot_cache[key] = dot
+    if len(_dot_cache) > DOT_CACHE_SIZE:
+        _dot_cache.popitem(last=False)
+    return dot
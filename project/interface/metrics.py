@@ -0,0 +1,136 @@
+import csv
+import json
+import struct
+import threading
+from array import array
+
+_MAGIC = b"MTMS"
+
+
+class MetricsStore:
+    """Column store for the metrics logged during training.
+
+    Each column is a preallocated `array` that doubles when full, so
+    appending a row is amortized O(1). With `ring=True` the store keeps
+    only the last `capacity` rows, overwriting the oldest. Appends and
+    reads hold a lock, so a reader on another thread always sees whole
+    rows.
+
+    Args:
+        columns: Mapping of column name to `array` typecode, e.g.
+            `{"epoch": "q", "loss": "d"}`.
+        capacity: Initial number of rows, or the fixed size of a ring.
+        ring: Whether to keep only the last `capacity` rows.
+    """
+
+    def __init__(self, columns, capacity=1024, ring=False):
+        self.typecodes = dict(columns)
+        self.capacity = capacity
+        self.ring = ring
+        self.columns = {name: self._alloc(t, capacity) for name, t in columns.items()}
+        self.start = 0
+        self.size = 0
+        # Rows ever appended, including ones a ring has dropped.
+        self.total = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _alloc(typecode, n):
+        return array(typecode, bytes(array(typecode).itemsize * n))
+
+    def __len__(self):
+        return self.size
+
+    def append(self, **values):
+        "Add one row, given a value for every column."
+        with self.lock:
+            self._append(values)
+
+    def _append(self, values):
+        if self.size == self.capacity:
+            if self.ring:
+                self.start = (self.start + 1) % self.capacity
+                self.size -= 1
+            else:
+                for name, col in self.columns.items():
+                    col.extend(self._alloc(self.typecodes[name], self.capacity))
+                self.capacity *= 2
+        i = (self.start + self.size) % self.capacity
+        for name, col in self.columns.items():
+            col[i] = values[name]
+        self.size += 1
+        self.total += 1
+
+    def column(self, name, start=0, stop=None):
+        "Values of one column for rows `start` to `stop`, oldest first."
+        with self.lock:
+            return self._column(name, start, stop)
+
+    def _column(self, name, start, stop):
+        start, stop, _ = slice(start, stop).indices(self.size)
+        if stop <= start:
+            return []
+        col = self.columns[name]
+        lo = (self.start + start) % self.capacity
+        hi = lo + (stop - start)
+        if hi <= self.capacity:
+            return col[lo:hi].tolist()
+        return col[lo:].tolist() + col[: hi - self.capacity].tolist()
+
+    def rows(self, start=0, stop=None):
+        "Rows `start` to `stop` as a dict of column lists, e.g. for a DataFrame."
+        # Read every column under one hold of the lock, so they cover the
+        # same rows even if another thread appends, or a ring wraps,
+        # meanwhile.
+        with self.lock:
+            return {name: self._column(name, start, stop) for name in self.columns}
+
+    def tail(self, n):
+        "The last `n` rows as a dict of column lists."
+        return self.rows(-n) if n > 0 else self.rows(self.size)
+
+    def to_csv(self, path):
+        "Write the rows as CSV to a path or an open text file."
+        if hasattr(path, "write"):
+            self._write_csv(path)
+        else:
+            with open(path, "w", newline="") as f:
+                self._write_csv(f)
+
+    def _write_csv(self, f):
+        writer = csv.writer(f)
+        writer.writerow(list(self.columns))
+        writer.writerows(zip(*self.rows().values()))
+
+    def save(self, path):
+        """Write the rows in a compact binary format.
+
+        A JSON header giving the columns, typecodes and row count is
+        followed by each column's values packed one after another.
+        """
+        with self.lock:
+            rows = {name: self._column(name, 0, None) for name in self.columns}
+            size, total = self.size, self.total
+        header = json.dumps(
+            {"columns": self.typecodes, "rows": size, "total": total}
+        ).encode()
+        with open(path, "wb") as f:
+            f.write(_MAGIC + struct.pack("<I", len(header)) + header)
+            for name, t in self.typecodes.items():
+                array(t, rows[name]).tofile(f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            if f.read(4) != _MAGIC:
+                raise ValueError(f"{path} is not a metrics file.")
+            (length,) = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(length))
+            store = cls(header["columns"], capacity=max(header["rows"], 1))
+            for name, t in header["columns"].items():
+                col = array(t)
+                col.fromfile(f, header["rows"])
+                store.columns[name][: len(col)] = col
+        store.size = header["rows"]
+        store.total = header["total"]
+        return store
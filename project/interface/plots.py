@@ -1,7 +1,93 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
 import plotly.graph_objects as go
 
 
-def make_scatters(graph, model=None, size=50):
+@lru_cache(maxsize=16)
+def grid_axis(size):
+    "Coordinates along one side of a decision grid of `size`."
+    return tuple(j / (size + 1.0) for j in range(size + 1))
+
+
+@lru_cache(maxsize=16)
+def grid_points(size):
+    "All points of the decision grid of `size`, row by row."
+    axis = grid_axis(size)
+    return tuple((x, y) for y in axis for x in axis)
+
+
+def _interpolate(z, j0, j1, k0, k1):
+    # Bilinear fill of the cell between grid columns j0..j1 and rows k0..k1.
+    a, b, c, d = z[k0][j0], z[k0][j1], z[k1][j0], z[k1][j1]
+    for k in range(k0, k1 + 1):
+        v = (k - k0) / (k1 - k0)
+        for j in range(j0, j1 + 1):
+            u = (j - j0) / (j1 - j0)
+            z[k][j] = (a * (1 - u) + b * u) * (1 - v) + (c * (1 - u) + d * u) * v
+
+
+def evaluate_grid(model, size, coarse_step=1, level=0.5):
+    """Evaluate `model` on the decision grid of `size`.
+
+    `model` takes a list of points and returns one value per point. The
+    whole grid is passed in one call. With `coarse_step > 1`, only every
+    `coarse_step`-th row and column are evaluated first; the remaining
+    points are evaluated only in cells whose corners cross `level`, and
+    interpolated elsewhere.
+
+    Returns the values as a list of rows.
+    """
+    n = size + 1
+    axis = grid_axis(size)
+    if coarse_step <= 1:
+        values = [float(v) for v in model(list(grid_points(size)))]
+        return [values[k * n : (k + 1) * n] for k in range(n)]
+
+    coarse = sorted(set(range(0, n, coarse_step)) | {n - 1})
+    z = [[0.0] * n for _ in range(n)]
+    values = model([(axis[j], axis[k]) for k in coarse for j in coarse])
+    for i, v in enumerate(values):
+        z[coarse[i // len(coarse)]][coarse[i % len(coarse)]] = float(v)
+
+    todo = []
+    for k0, k1 in zip(coarse, coarse[1:]):
+        for j0, j1 in zip(coarse, coarse[1:]):
+            corners = (z[k0][j0], z[k0][j1], z[k1][j0], z[k1][j1])
+            crosses = min(corners) <= level <= max(corners)
+            _interpolate(z, j0, j1, k0, k1)
+            if crosses:
+                todo.extend(
+                    (j, k) for k in range(k0, k1 + 1) for j in range(j0, j1 + 1)
+                )
+    # Cells share edges, so a point may be listed more than once.
+    todo = list(dict.fromkeys(todo))
+    if todo:
+        values = model([(axis[j], axis[k]) for j, k in todo])
+        for (j, k), v in zip(todo, values):
+            z[k][j] = float(v)
+    return z
+
+
+def _contour(z, size):
+    colorscale = [[0, "#69bac9"], [1.0, "#ea8484"]]
+    return go.Contour(
+        z=z,
+        dx=1 / size,
+        x0=0,
+        dy=1 / size,
+        y0=0,
+        zmin=0.2,
+        zmax=0.8,
+        line_smoothing=0.5,
+        colorscale=colorscale,
+        opacity=0.6,
+        showscale=False,
+    )
+
+
+def make_scatters(graph, model=None, size=50, coarse_step=1):
     color_map = ["#69bac9", "#ea8484"]
     symbol_map = ["circle-dot", "x"]
     colors = [color_map[y] for y in graph.y]
@@ -9,26 +95,7 @@ def make_scatters(graph, model=None, size=50):
     scatters = []
 
     if model is not None:
-        colorscale = [[0, "#69bac9"], [1.0, "#ea8484"]]
-        z = [
-            model([[j / (size + 1.0), k / (size + 1.0)] for j in range(size + 1)])
-            for k in range(size + 1)
-        ]
-        scatters.append(
-            go.Contour(
-                z=z,
-                dx=1 / size,
-                x0=0,
-                dy=1 / size,
-                y0=0,
-                zmin=0.2,
-                zmax=0.8,
-                line_smoothing=0.5,
-                colorscale=colorscale,
-                opacity=0.6,
-                showscale=False,
-            )
-        )
+        scatters.append(_contour(evaluate_grid(model, size, coarse_step), size))
     scatters.append(
         go.Scatter(
             mode="markers",
@@ -42,14 +109,30 @@ def make_scatters(graph, model=None, size=50):
     return scatters
 
 
-def animate(self, models, names):
+def animate(self, models, names=None, frames=None):
+    """Slider over decision boundaries.
+
+    `models` is a list of model callables labelled by `names`, or a
+    `Replay`, in which case only the snapshots at indices `frames` are
+    evaluated (by default at most 50, evenly spaced) and labelled by epoch.
+    """
     import plotly.graph_objects as go
 
-    scatters = [make_scatters(self, m) for m in models]
-    background = [s[0] for s in scatters]
+    if isinstance(models, Replay):
+        if frames is None:
+            frames = models.sample(50)
+        if names is None:
+            names = [models.epochs[i] for i in frames]
+        background = [_contour(z, models.size) for z in models.frames(frames)]
+        points = make_scatters(self)[0]
+        prefix = "epoch="
+    else:
+        scatters = [make_scatters(self, m) for m in models]
+        background = [s[0] for s in scatters]
+        points = scatters[0][1]
+        prefix = "b="
     for i, b in enumerate(background):
         b["visible"] = i == 0
-    points = scatters[0][1]
     steps = []
     for i in range(len(background)):
         step = dict(
@@ -64,7 +147,7 @@ def animate(self, models, names):
         steps.append(step)
 
     sliders = [
-        dict(active=0, currentvalue={"prefix": "b="}, pad={"t": 50}, steps=steps)
+        dict(active=0, currentvalue={"prefix": prefix}, pad={"t": 50}, steps=steps)
     ]
 
     fig = go.Figure(
@@ -97,13 +180,13 @@ def make_oned(graph, model=None, size=50):
 
     if model is not None:
         # colorscale = [[0, "#69bac9"], [1.0, "#ea8484"]]
-        y = model([[j / (size + 1.0), 0.0] for j in range(size + 1)])
+        x = grid_axis(size)
+        y = model([[j, 0.0] for j in x])
 
-        x = [j / (size + 1.0) for j in range(size + 1)]
         scatters.append(
             go.Scatter(
                 mode="lines",
-                x=[j / (size + 1.0) for j in range(size + 1)],
+                x=x,
                 y=y,
                 marker=dict(size=15, line=dict(width=3, color="Black")),
             )
@@ -122,11 +205,11 @@ def make_oned(graph, model=None, size=50):
     return scatters
 
 
-def plot_out(graph, model=None, name="", size=50, oned=False):
+def plot_out(graph, model=None, name="", size=50, oned=False, coarse_step=1):
     if oned:
         scatters = make_oned(graph, model, size=size)
     else:
-        scatters = make_scatters(graph, model, size=size)
+        scatters = make_scatters(graph, model, size=size, coarse_step=coarse_step)
 
     fig = go.Figure(scatters)
     fig.update_layout(
@@ -144,6 +227,116 @@ def plot_out(graph, model=None, name="", size=50, oned=False):
     return fig
 
 
+class PlotState:
+    """The figure for one dataset, with the model's trace updated in place.
+
+    The data points and layout are built once. `update(model)` evaluates
+    the model again and replaces only the contour's `z` (or the line's `y`
+    with `oned=True`). With `widget=True` the figure is a
+    `go.FigureWidget`, which sends just that property to the browser.
+    """
+
+    def __init__(self, graph, size=50, oned=False, coarse_step=1, widget=False):
+        self.graph = graph
+        self.size = size
+        self.oned = oned
+        self.coarse_step = coarse_step
+        fig = plot_out(graph, _blank, size=size, oned=oned, coarse_step=coarse_step)
+        self.figure = go.FigureWidget(fig) if widget else fig
+        self.trace = self.figure.data[0]
+
+    def update(self, model):
+        "Redraw the model's output and return the figure."
+        if self.oned:
+            return self.show(model([[x, 0.0] for x in grid_axis(self.size)]))
+        return self.show(evaluate_grid(model, self.size, self.coarse_step))
+
+    def show(self, values):
+        "Show already evaluated grid values and return the figure."
+        with self.figure.batch_update():
+            self.trace.update({"y" if self.oned else "z": values})
+        return self.figure
+
+
+class Replay:
+    """Decision boundaries for recorded parameter snapshots.
+
+    `snapshots` is a `SnapshotRecorder` and `make_model(vector)` returns
+    the model callable for one of its parameter vectors. Frames are
+    evaluated when first asked for, in a pool of `workers` threads, and
+    cached; asking for a frame also queues the next `prefetch` ones so
+    scrubbing forward rarely waits.
+    """
+
+    def __init__(
+        self,
+        graph,
+        snapshots,
+        make_model,
+        size=50,
+        coarse_step=1,
+        workers=4,
+        prefetch=4,
+    ):
+        self.snapshots = snapshots
+        self.make_model = make_model
+        self.size = size
+        self.coarse_step = coarse_step
+        self.prefetch = prefetch
+        self.state = PlotState(graph, size=size, coarse_step=coarse_step)
+        self.pool = ThreadPoolExecutor(workers)
+        self.futures = {}
+        self.lock = threading.Lock()
+
+    @property
+    def epochs(self):
+        return self.snapshots.epochs
+
+    def __len__(self):
+        return len(self.snapshots)
+
+    def sample(self, n):
+        "Indices of at most `n` evenly spaced snapshots, including the last."
+        count = len(self)
+        if count <= n:
+            return list(range(count))
+        return [round(i * (count - 1) / (n - 1)) for i in range(n)]
+
+    def _submit(self, i):
+        with self.lock:
+            if i not in self.futures:
+                self.futures[i] = self.pool.submit(self._evaluate, i)
+            return self.futures[i]
+
+    def _evaluate(self, i):
+        model = self.make_model(self.snapshots[i])
+        return evaluate_grid(model, self.size, self.coarse_step)
+
+    def frame(self, i):
+        "Grid values of snapshot `i`."
+        i = range(len(self))[i]
+        future = self._submit(i)
+        for j in range(i + 1, min(i + 1 + self.prefetch, len(self))):
+            self._submit(j)
+        return future.result()
+
+    def frames(self, indices):
+        "Grid values of several snapshots, evaluated concurrently."
+        futures = [self._submit(i) for i in indices]
+        return [f.result() for f in futures]
+
+    def figure(self, i):
+        "The dataset figure showing snapshot `i`."
+        return self.state.show(self.frame(i))
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _blank(points):
+    return [0.5] * len(points)
+
+
 def plot(graph, model=None, name=""):
     plot_out(graph, model, name).show()
 
@@ -163,9 +356,13 @@ def plot_function(title, fn, arange=[(i / 10.0) - 5 for i in range(0, 100)], fn2
     return fig.show()
 
 
+@lru_cache(maxsize=1)
+def _surface_axis():
+    return [((x / 10.0) - 5.0 + 1e-5) for x in range(1, 100)]
+
+
 def plot_function3D(title, fn, arange=[(i / 5.0) - 4.0 for i in range(0, 40)]):
-    xs = [((x / 10.0) - 5.0 + 1e-5) for x in range(1, 100)]
-    ys = [((x / 10.0) - 5.0 + 1e-5) for x in range(1, 100)]
+    xs = ys = _surface_axis()
     zs = [[fn(x, y) for x in xs] for y in ys]
 
     scatter = go.Surface(x=xs, y=ys, z=zs)
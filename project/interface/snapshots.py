@@ -0,0 +1,49 @@
+from array import array
+
+
+class SnapshotRecorder:
+    """Parameter vectors recorded during training, for replaying later.
+
+    Pass one as `recorder` to `train`. Every `every` epochs it stores the
+    model's flattened parameters as float32, one after another in a
+    single `array`.
+    """
+
+    def __init__(self, every=1):
+        self.every = every
+        self.epochs = []
+        self.data = array("f")
+        self.width = None
+
+    def __len__(self):
+        return len(self.epochs)
+
+    def __getitem__(self, i):
+        "The parameter vector of the `i`-th snapshot."
+        i = range(len(self.epochs))[i]
+        return self.data[i * self.width : (i + 1) * self.width]
+
+    def due(self, epoch):
+        "Whether `record` would store a snapshot at `epoch`."
+        return epoch % self.every == 0
+
+    def record(self, epoch, vector):
+        "Store `vector`, a flat sequence or float32 buffer, if `epoch` is due."
+        if not self.due(epoch):
+            return
+        start = len(self.data)
+        try:
+            view = memoryview(vector)
+        except TypeError:
+            view = None
+        if view is not None and view.format == "f" and view.c_contiguous:
+            self.data.frombytes(view.cast("B"))
+        else:
+            self.data.extend(vector)
+        width = len(self.data) - start
+        if self.width is None:
+            self.width = width
+        elif width != self.width:
+            del self.data[start:]
+            raise ValueError(f"Expected {self.width} parameters, got {width}.")
+        self.epochs.append(epoch)
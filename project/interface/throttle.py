@@ -0,0 +1,92 @@
+import queue
+import threading
+import time
+
+_STOP = object()
+
+
+class ThrottledLogger:
+    """Decouples a training loop from redrawing its UI.
+
+    `log_fn` has the signature `train` expects, but only queues the
+    metrics. A background thread collects whatever has been queued and
+    calls `render(updates, losses)` at most `max_hz` times a second, where
+    `updates` is the list of `(epoch, total_loss, correct)` logged since
+    the last call and `losses` is the training loop's list of losses.
+    """
+
+    def __init__(self, render, max_hz=2.0, maxsize=256, setup_thread=None):
+        self.render = render
+        self.interval = 1.0 / max_hz
+        self.queue = queue.Queue(maxsize)
+        self.losses = []
+        self.error = None
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        if setup_thread is not None:
+            setup_thread(self.thread)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def log_fn(self, epoch, total_loss, correct, losses):
+        self.losses = losses
+        item = (epoch, total_loss, correct)
+        while True:
+            try:
+                self.queue.put_nowait(item)
+                return
+            except queue.Full:
+                # Never block training: drop the oldest update instead.
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def close(self, timeout=10.0):
+        """Render anything still queued and stop the background thread.
+
+        Gives up after `timeout` seconds rather than blocking the script
+        on a thread that has stopped consuming the queue.
+        """
+        deadline = time.monotonic() + timeout
+        while self.thread.is_alive():
+            try:
+                self.queue.put(_STOP, timeout=0.1)
+                break
+            except queue.Full:
+                if time.monotonic() > deadline:
+                    break
+        if self.thread.is_alive():
+            self.thread.join(max(deadline - time.monotonic(), 0.0))
+        if self.error is not None:
+            raise self.error
+
+    def _run(self):
+        last = 0.0
+        done = False
+        while not done:
+            batch = [self.queue.get()]
+            done = batch[-1] is _STOP
+            # Keep collecting until the next frame is due.
+            while not done:
+                timeout = last + self.interval - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+                done = batch[-1] is _STOP
+
+            updates = [b for b in batch if b is not _STOP]
+            if updates and self.error is None:
+                try:
+                    self.render(updates, self.losses)
+                except BaseException as e:
+                    # Re-raised by `close`. Catching BaseException too
+                    # (Streamlit's script control exceptions are not
+                    # `Exception`s) keeps this thread draining the queue,
+                    # so `close` can still stop it.
+                    self.error = e
+                last = time.monotonic()
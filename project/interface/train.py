@@ -1,15 +1,32 @@
+import io
 import time
 
 import graph_builder
 import interface.plots as plots
-import networkx as nx
 import pandas as pd
-import plotly.graph_objects as go
 import streamlit as st
+from interface.metrics import MetricsStore
+from interface.snapshots import SnapshotRecorder
+from interface.throttle import ThrottledLogger
+
+try:
+    from streamlit.runtime.scriptrunner import add_script_run_ctx
+except ImportError:
+    from streamlit.scriptrunner import add_script_run_ctx
 
 import minitorch
 
 
+# Number of most recent epochs shown in the metrics table.
+STATS_ROWS = 100
+
+# Most ops drawn in the model graph.
+GRAPH_OPS = 5000
+
+# `st.cache` is deprecated in favour of `st.cache_data`.
+cache_data = getattr(st, "cache_data", None) or st.cache
+
+
 def render_train_interface(
     TrainCls, graph=True, hidden_layer=True, parameter_control=False
 ):
@@ -21,7 +38,7 @@ def render_train_interface(
     points = col2.slider("Number of points", min_value=1, max_value=150, value=50)
     selected_dataset = col1.selectbox("Select dataset", list(datasets_map.keys()))
 
-    @st.cache
+    @cache_data
     def get_dataset(selected_dataset, points):
         return datasets_map[selected_dataset](points)
 
@@ -39,16 +56,25 @@ def render_train_interface(
     else:
         hidden_layers = 0
 
-    @st.cache
-    def get_train(hidden_layers):
+    # Names the model class in cache keys and session state, so the
+    # pages of different models never share entries.
+    train_name = f"{TrainCls.__module__}.{TrainCls.__qualname__}"
+
+    @cache_data
+    def get_train(train_name, selected_dataset, points, hidden_layers):
+        # The cache hashes the arguments, not the closure: they identify
+        # the `TrainCls` and `dataset` used here.
         train = TrainCls(hidden_layers)
         one_output = train.run_one(dataset.X[0])
-        G = graph_builder.GraphBuilder().run(one_output)
-        return nx.nx_pydot.to_pydot(G).to_string()
+        G = graph_builder.GraphBuilder().run(one_output, max_nodes=GRAPH_OPS)
+        # Same-sized models give the same structure, so this is cached
+        # across datasets too; each hidden unit after the first is drawn
+        # as a single node.
+        return graph_builder.render_dot(G, collapse=True)
 
     train = TrainCls(hidden_layers)
     if graph:
-        graph = get_train(hidden_layers)
+        graph = get_train(train_name, selected_dataset, points, hidden_layers)
         if st.checkbox("Show Graph"):
             st.graphviz_chart(graph)
 
@@ -62,12 +88,23 @@ def render_train_interface(
 
     oned = st.checkbox("Show X-Axis Only (For Simple)", False)
 
+    plot_state = {}
+
     def plot():
+        # Build the figure once per dataset and view; later calls only
+        # replace the contour values.
+        key = (id(dataset), oned)
+        if key not in plot_state:
+            plot_state.clear()
+            state = plots.PlotState(dataset, size=30, oned=oned, coarse_step=3)
+            state.figure.update_layout(width=600, height=600)
+            plot_state[key] = state
+
         if hasattr(train, "run_many"):
 
             def contour(ls):
                 t = train.run_many(ls)
-                return [t[i, 0] for i in range(len(ls))]
+                return [t[i][0] for i in range(len(ls))]
 
         else:
 
@@ -76,9 +113,7 @@ def render_train_interface(
                 out = [(x.data if hasattr(x, "data") else x) for x in out]
                 return out
 
-        fig = plots.plot_out(dataset, contour, size=15, oned=oned)
-        fig.update_layout(width=600, height=600)
-        return fig
+        return plot_state[key].update(contour)
 
     st.markdown("### Initial setting")
     st.write(plot())
@@ -106,9 +141,15 @@ def render_train_interface(
 
     start_time = time.time()
 
-    df = []
+    # Snapshots from the last training run, replayed while the settings
+    # they were trained with are unchanged.
+    replay_key = (train_name, selected_dataset, points, hidden_layers)
+
+    metrics = MetricsStore({"epoch": "q", "loss": "d", "correct": "q"})
+    loss_chart = {"element": None, "shown": 0}
 
-    def log_fn(epoch, total_loss, correct, losses):
+    def render(updates, losses):
+        epoch, total_loss, correct = updates[-1]
         time_elapsed = time.time() - start_time
         if hasattr(train, "train"):
             st_progress.progress(epoch / max_epochs)
@@ -121,25 +162,67 @@ def render_train_interface(
                     (max_epochs - epoch) * time_per_epoch,
                 )
             )
-        df.append({"epoch": epoch, "loss": total_loss, "correct": correct})
-        st_epoch_stats.write(pd.DataFrame(reversed(df)))
+        recent = pd.DataFrame(metrics.tail(STATS_ROWS))
+        st_epoch_stats.write(recent.iloc[::-1].reset_index(drop=True))
 
         st_epoch_image.plotly_chart(plot())
         if hasattr(train, "train"):
-            loss_graph = go.Scatter(mode="lines", x=list(range(len(losses))), y=losses)
-            fig = go.Figure(loss_graph)
-            fig.update_layout(
-                title="Loss Graph",
-                xaxis=dict(range=[0, max_epochs]),
-                yaxis=dict(range=[0, max(losses)]),
-            )
-            st_epoch_plot.plotly_chart(fig)
+            # Only send the losses the chart does not have yet.
+            shown, total = loss_chart["shown"], len(losses)
+            new = pd.DataFrame({"loss": losses[shown:total]}, index=range(shown, total))
+            if loss_chart["element"] is None:
+                loss_chart["element"] = st_epoch_plot.line_chart(new)
+            else:
+                loss_chart["element"].add_rows(new)
+            loss_chart["shown"] = total
 
             print(
                 f"Epoch: {epoch}/{max_epochs}, loss: {total_loss}, correct: {correct}"
             )
 
     if hasattr(train, "train") and st_train_button.button("Train Model"):
-        train.train(dataset, learning_rate, max_epochs, log_fn)
+        logger = ThrottledLogger(render, max_hz=2.0, setup_thread=add_script_run_ctx)
+        logger.start()
+
+        def log_fn(epoch, total_loss, correct, losses):
+            metrics.append(epoch=epoch, loss=total_loss, correct=correct)
+            logger.log_fn(epoch, total_loss, correct, losses)
+
+        # Keep at most about 200 snapshots for the replay.
+        recorder = SnapshotRecorder(every=max(1, max_epochs // 200))
+        replayable = hasattr(train, "snapshot_model")
+        kwargs = {"recorder": recorder} if replayable else {}
+        try:
+            train.train(dataset, learning_rate, max_epochs, log_fn, **kwargs)
+        finally:
+            logger.close()
+
+        if len(recorder):
+            old = st.session_state.get("replay")
+            if old is not None:
+                old[1].close()
+            replay = plots.Replay(
+                dataset, recorder, train.snapshot_model, size=30, coarse_step=3
+            )
+            st.session_state["replay"] = (replay_key, replay)
+
+        out = io.StringIO()
+        metrics.to_csv(out)
+        st.download_button(
+            "Download metrics", out.getvalue(), file_name="metrics.csv", mime="text/csv"
+        )
     else:
-        log_fn(0, 0, 0, [0])
+        metrics.append(epoch=0, loss=0, correct=0)
+        render([(0, 0, 0)], [0])
+
+    saved = st.session_state.get("replay")
+    if saved is not None and saved[0] == replay_key:
+        replay = saved[1]
+        st.markdown("### Replay")
+        i = st.select_slider(
+            "Epoch",
+            options=list(range(len(replay))),
+            value=len(replay) - 1,
+            format_func=lambda i: replay.epochs[i],
+        )
+        st.plotly_chart(replay.figure(i))
@@ -1,5 +1,4 @@
 import graph_builder
-import networkx as nx
 import plotly.graph_objects as go
 import streamlit as st
 from interface.streamlit_utils import render_function
@@ -62,7 +61,7 @@ def render_math_sandbox(use_scalar=False, use_tensor=False):
             st.write(fig)
             G = graph_builder.GraphBuilder().run(out)
             G.graph["graph"] = {"rankdir": "LR"}
-            st.graphviz_chart(nx.nx_pydot.to_pydot(G).to_string())
+            st.graphviz_chart(graph_builder.render_dot(G))
 
     if f_type == "Two Arg":
         st.write("### " + name)
@@ -1,3 +1,4 @@
+import graph_builder
 import networkx as nx
 import streamlit as st
 from streamlit_ace import st_ace
@@ -44,4 +45,4 @@ class MyModule(minitorch.Module):
             stack.append((m, name + "." + cname))
 
     G.graph["graph"] = {"rankdir": "TB"}
-    st.graphviz_chart(nx.nx_pydot.to_pydot(G).to_string())
+    st.graphviz_chart(graph_builder.to_dot(G))
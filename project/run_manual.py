@@ -17,6 +17,10 @@ class Network(minitorch.Module):
         y = self.linear(x)
         return minitorch.operators.sigmoid(y[0])
 
+    def forward_many(self, X):
+        ys = self.linear.forward_many(X)
+        return minitorch.operators.sigmoid_buffer([y[0] for y in ys])
+
 
 class Linear(minitorch.Module):
     def __init__(self, in_size, out_size):
@@ -41,6 +45,19 @@ class Linear(minitorch.Module):
                 y[j] = y[j] + x * self.weights[i][j].value
         return y
 
+    def forward_many(self, X):
+        "Batched `forward`, reading each weight once for the whole batch."
+        bias = [b.value for b in self.bias]
+        weights = [[w.value for w in row] for row in self.weights]
+        out = []
+        for inputs in X:
+            y = bias[:]
+            for x, row in zip(inputs, weights):
+                for j, w in enumerate(row):
+                    y[j] += x * w
+            out.append(y)
+        return out
+
 
 class ManualTrain:
     def __init__(self, hidden_layers):
@@ -48,3 +65,6 @@ class ManualTrain:
 
     def run_one(self, x):
         return self.model.forward((x[0], x[1]))
+
+    def run_many(self, X):
+        return [[y] for y in self.model.forward_many(X)]
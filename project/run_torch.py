@@ -1,4 +1,12 @@
+import multiprocessing
+import multiprocessing.connection
+import threading
+import traceback
+from multiprocessing import shared_memory
+
+import numpy as np
 import torch
+from torch.nn.utils import parameters_to_vector, vector_to_parameters
 
 import minitorch
 
@@ -7,6 +15,23 @@ def default_log_fn(epoch, total_loss, correct, losses):
     print("Epoch ", epoch, " loss ", total_loss, "correct", correct)
 
 
+def tensor_X(data):
+    if isinstance(data, minitorch.ColumnarGraph) and data.N:
+        # View the packed doubles directly instead of walking Python tuples.
+        # `torch.tensor` copies and converts them in one pass, and unlike
+        # `torch.frombuffer` accepts the read-only buffer of a mapped file.
+        X = np.frombuffer(data.points, dtype=np.float64).reshape(-1, 2)
+        return torch.tensor(X, dtype=torch.get_default_dtype())
+    return torch.tensor(data.X)
+
+
+def tensor_y(data):
+    if isinstance(data, minitorch.ColumnarGraph) and data.N:
+        y = np.frombuffer(data.labels, dtype=np.int8)
+        return torch.tensor(y, dtype=torch.long)
+    return torch.tensor(data.y)
+
+
 class Network(torch.nn.Module):
     def __init__(self, hidden_layers):
         super().__init__()
@@ -43,41 +68,266 @@ class TorchTrain:
     def run_many(self, X):
         return self.model.forward(torch.tensor(X)).detach()
 
+    def snapshot_model(self, vector):
+        "A model callable for a parameter vector recorded during `train`."
+        model = Network(self.hidden_layers)
+        vector_to_parameters(
+            torch.frombuffer(vector, dtype=torch.float32), model.parameters()
+        )
+
+        def run(X):
+            with torch.no_grad():
+                return model.forward(torch.tensor(X)).view(-1).tolist()
+
+        return run
+
     def train(
         self,
         data,
         learning_rate,
         max_epochs=500,
         log_fn=default_log_fn,
+        workers=1,
+        batch_size=None,
+        shuffle=False,
+        recorder=None,
     ):
         self.model = Network(self.hidden_layers)
         self.max_epochs = max_epochs
+        if workers > 1:
+            if batch_size is not None:
+                raise ValueError("Data-parallel training runs on the full batch.")
+            return self.train_parallel(
+                data, learning_rate, max_epochs, log_fn, workers, recorder
+            )
         model = self.model
 
         losses = []
         for epoch in range(1, max_epochs + 1):
-            # Forward
-            out = model.forward(torch.tensor(data.X, requires_grad=True)).view(data.N)
-            y = torch.tensor(data.y)
-            probs = (out * y) + (out - 1.0) * (y - 1.0)
-            loss = -probs.log().sum()
+            if batch_size is None:
+                parts = [data]
+            else:
+                parts = minitorch.batches(data, batch_size, shuffle, seed=epoch)
 
-            # Update
-            loss.view(1).backward()
+            loss_num, correct = 0.0, 0
+            for part in parts:
+                X = tensor_X(part)
+                y = tensor_y(part)
+                part_loss, part_correct = shard_step(model, X, y)
+                loss_num += part_loss
+                correct += part_correct
 
-            for p in model.parameters():
-                if p.grad is not None:
-                    p.data = p.data - learning_rate * (p.grad / float(data.N))
-                    p.grad.zero_()
+                # Update
+                for p in model.parameters():
+                    if p.grad is not None:
+                        p.data = p.data - learning_rate * (p.grad / float(part.N))
+                        p.grad.zero_()
+
+            if recorder is not None and recorder.due(epoch):
+                vector = parameters_to_vector(model.parameters()).detach()
+                recorder.record(epoch, vector.float().numpy())
 
             # Logging
-            pred = out > 0.5
-            correct = ((y == 1) * (pred)).sum() + ((y == 0) * (~pred)).sum()
-            loss_num = loss.reshape(-1).item()
             losses.append(loss_num)
 
             if epoch % 10 == 0 or epoch == max_epochs:
-                log_fn(epoch, loss_num, correct.item(), losses)
+                log_fn(epoch, loss_num, correct, losses)
+
+    def train_parallel(
+        self,
+        data,
+        learning_rate,
+        max_epochs,
+        log_fn,
+        workers,
+        recorder=None,
+        timeout=300.0,
+    ):
+        """Data-parallel `train`.
+
+        The points are split into one shard per worker process. Every
+        epoch, each worker computes the loss gradient of its shard into
+        its row of a shared-memory buffer; the rows are then summed and
+        the same SGD update as `train` is applied to the shared parameter
+        vector that all workers read from.
+
+        If a worker raises or dies, or an epoch takes longer than
+        `timeout` seconds, the other workers are stopped and a
+        `RuntimeError` is raised.
+        """
+        model = self.model
+        params = parameters_to_vector(model.parameters()).detach()
+        n = params.numel()
+        ctx = multiprocessing.get_context("spawn")
+        # Shared parameters, then one row of gradients and one row of
+        # (loss, correct) per worker.
+        shm = shared_memory.SharedMemory(create=True, size=4 * n * (1 + workers))
+        stats_shm = shared_memory.SharedMemory(create=True, size=8 * 2 * workers)
+        start = ctx.Barrier(workers + 1)
+        done = ctx.Barrier(workers + 1)
+        errors = ctx.SimpleQueue()
+        stopped = threading.Event()
+        procs = []
+        try:
+            buf = torch.frombuffer(shm.buf, dtype=torch.float32)
+            shared_params = buf[:n]
+            grads = buf[n:].view(workers, n)
+            stats = torch.frombuffer(stats_shm.buf, dtype=torch.float64).view(
+                workers, 2
+            )
+            shared_params.copy_(params)
+
+            size = len(data.X)
+            for rank in range(workers):
+                lo, hi = size * rank // workers, size * (rank + 1) // workers
+                proc = ctx.Process(
+                    target=shard_worker,
+                    args=(
+                        rank,
+                        self.hidden_layers,
+                        list(data.X[lo:hi]),
+                        list(data.y[lo:hi]),
+                        shm.name,
+                        stats_shm.name,
+                        n,
+                        workers,
+                        start,
+                        done,
+                        errors,
+                    ),
+                    daemon=True,
+                )
+                proc.start()
+                procs.append(proc)
+            watchdog = threading.Thread(
+                target=watch_workers, args=(procs, (start, done), stopped), daemon=True
+            )
+            watchdog.start()
+
+            losses = []
+            for epoch in range(1, max_epochs + 1):
+                try:
+                    start.wait(timeout)
+                    done.wait(timeout)
+                except threading.BrokenBarrierError:
+                    stopped.set()
+                    raise worker_error(procs, errors, timeout) from None
+
+                # All-reduce the shard gradients and step.
+                shared_params.sub_(learning_rate * grads.sum(0) / float(data.N))
+                vector_to_parameters(shared_params, model.parameters())
+                if recorder is not None and recorder.due(epoch):
+                    recorder.record(epoch, shared_params.numpy())
+
+                loss_num, correct = stats.sum(0).tolist()
+                losses.append(loss_num)
+                if epoch % 10 == 0 or epoch == max_epochs:
+                    log_fn(epoch, loss_num, int(correct), losses)
+        finally:
+            # Breaking the barriers tells the workers to exit.
+            stopped.set()
+            start.abort()
+            done.abort()
+            for proc in procs:
+                proc.join(timeout)
+                if proc.is_alive():
+                    # Stuck outside the barriers, e.g. in a long shard step.
+                    proc.terminate()
+                    proc.join()
+            del buf, shared_params, grads, stats
+            shm.close()
+            shm.unlink()
+            stats_shm.close()
+            stats_shm.unlink()
+
+
+def watch_workers(procs, barriers, stopped):
+    """Break `barriers` as soon as a worker exits before `stopped` is set.
+
+    Catches workers that die without reporting, e.g. killed for memory or
+    failing to import in the new interpreter, without waiting for the
+    barrier timeout.
+    """
+    sentinels = [proc.sentinel for proc in procs]
+    while not stopped.is_set():
+        if multiprocessing.connection.wait(sentinels, timeout=0.1):
+            if not stopped.is_set():
+                for barrier in barriers:
+                    barrier.abort()
+            return
+
+
+def worker_error(procs, errors, timeout):
+    "The `RuntimeError` to raise for a failed `train_parallel` epoch."
+    reports = []
+    while not errors.empty():
+        rank, message = errors.get()
+        reports.append(f"worker {rank} raised:\n{message}")
+    if not reports:
+        for rank, proc in enumerate(procs):
+            proc.join(0.5)
+            if proc.exitcode is not None:
+                reports.append(f"worker {rank} exited with code {proc.exitcode}")
+    if not reports:
+        reports.append(f"an epoch took longer than {timeout} s")
+    return RuntimeError("Data-parallel training failed: " + "\n".join(reports))
+
+
+def shard_step(model, X, y):
+    "Forward and backward over one set of points. Returns the loss and correct count."
+    out = model.forward(X.requires_grad_()).view(-1)
+    probs = (out * y) + (out - 1.0) * (y - 1.0)
+    loss = -probs.log().sum()
+    loss.view(1).backward()
+
+    pred = out > 0.5
+    correct = ((y == 1) * (pred)).sum() + ((y == 0) * (~pred)).sum()
+    return loss.reshape(-1).item(), correct.item()
+
+
+def shard_worker(
+    rank, hidden_layers, X, y, shm_name, stats_name, n, workers, start, done, errors
+):
+    "Worker process of `TorchTrain.train_parallel`."
+    try:
+        torch.set_num_threads(1)
+        shm = shared_memory.SharedMemory(name=shm_name)
+        stats_shm = shared_memory.SharedMemory(name=stats_name)
+        try:
+            buf = torch.frombuffer(shm.buf, dtype=torch.float32)
+            params, grad = buf[:n], buf[n:].view(workers, n)[rank]
+            stats = torch.frombuffer(stats_shm.buf, dtype=torch.float64).view(
+                workers, 2
+            )
+            model = Network(hidden_layers)
+            X = torch.tensor(X)
+            y = torch.tensor(y)
+            try:
+                while True:
+                    start.wait()
+                    vector_to_parameters(params, model.parameters())
+                    model.zero_grad()
+                    if len(X):
+                        stats[rank, 0], stats[rank, 1] = shard_step(model, X, y)
+                        grads = (p.grad for p in model.parameters())
+                        grad.copy_(parameters_to_vector(grads))
+                    else:
+                        stats[rank].zero_()
+                        grad.zero_()
+                    done.wait()
+            except threading.BrokenBarrierError:
+                # Training is over, or another worker failed.
+                pass
+            del buf, params, grad, stats
+        finally:
+            shm.close()
+            stats_shm.close()
+    except BaseException:
+        # Report, then release the parent and the other workers.
+        errors.put((rank, traceback.format_exc()))
+        start.abort()
+        done.abort()
+        raise SystemExit(1) from None
 
 
 if __name__ == "__main__":
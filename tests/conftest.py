@@ -0,0 +1,69 @@
+import json
+import zlib
+from collections import defaultdict
+from typing import Dict, List
+
+import pytest
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("minitorch")
+    group.addoption(
+        "--shard",
+        default=None,
+        help="run only shard i/n of the collected tests, e.g. 0/4",
+    )
+    group.addoption(
+        "--timings-json",
+        default=None,
+        help="write the seconds spent in each test to this JSON file",
+    )
+
+
+def _parse_shard(value: str) -> tuple:
+    try:
+        index, count = (int(x) for x in value.split("/"))
+    except ValueError:
+        raise pytest.UsageError(f"--shard expects i/n, got {value!r}") from None
+    if not 0 <= index < count:
+        raise pytest.UsageError(f"--shard index must be in [0, {count}), got {index}")
+    return index, count
+
+
+def pytest_collection_modifyitems(
+    config: pytest.Config, items: List[pytest.Item]
+) -> None:
+    value = config.getoption("--shard")
+    if value is None:
+        return
+    index, count = _parse_shard(value)
+    # Hash the test id so a test stays in the same shard when others are
+    # added, and the cases of one parametrized test are spread out.
+    keep, drop = [], []
+    for item in items:
+        shard = zlib.crc32(item.nodeid.encode()) % count
+        (keep if shard == index else drop).append(item)
+    if drop:
+        config.hook.pytest_deselected(items=drop)
+        items[:] = keep
+
+
+class Timings:
+    "Collects the time spent in each test, over setup, call and teardown."
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.seconds: Dict[str, float] = defaultdict(float)
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport) -> None:
+        self.seconds[report.nodeid] += report.duration
+
+    def pytest_sessionfinish(self) -> None:
+        with open(self.path, "w") as f:
+            json.dump(self.seconds, f, indent=1)
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    path = config.getoption("--timings-json")
+    if path is not None:
+        config.pluginmanager.register(Timings(path), "minitorch-timings")
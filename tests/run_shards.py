@@ -0,0 +1,87 @@
+"""
+Run the test suite split across processes.
+
+Each shard is a pytest process running a fixed share of the tests with the
+`parallel` hypothesis profile and a fixed seed, so a run is reproducible
+and failing examples are kept in `.hypothesis/` for the next run. Extra
+arguments go to pytest, e.g. to select a task:
+
+>>> python -m tests.run_shards -n 4 -- -m task0_1
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+# Exit code of a pytest run that selected no tests.
+NO_TESTS = 5
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", "--shards", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", default="0", help="hypothesis seed")
+    parser.add_argument(
+        "--slowest", type=int, default=10, help="number of slowest tests to list"
+    )
+    parser.add_argument("pytest_args", nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+    pytest_args = args.pytest_args
+    if pytest_args[:1] == ["--"]:
+        pytest_args = pytest_args[1:]
+
+    env = dict(os.environ)
+    env.setdefault("HYPOTHESIS_PROFILE", "parallel")
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as tmp:
+        shards = []
+        for i in range(args.shards):
+            timings = os.path.join(tmp, f"{i}.json")
+            cmd = [
+                sys.executable,
+                "-m",
+                "pytest",
+                "-q",
+                f"--shard={i}/{args.shards}",
+                f"--timings-json={timings}",
+                f"--hypothesis-seed={args.seed}",
+                *pytest_args,
+            ]
+            proc = subprocess.Popen(
+                cmd,
+                env=env,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+            )
+            shards.append((proc, timings))
+
+        codes = []
+        seconds = {}
+        for i, (proc, timings) in enumerate(shards):
+            output, _ = proc.communicate()
+            codes.append(proc.returncode)
+            print(f"--- shard {i}/{args.shards} (exit {proc.returncode})")
+            print(output.rstrip())
+            if os.path.exists(timings):
+                with open(timings) as f:
+                    seconds.update(json.load(f))
+
+    elapsed = time.perf_counter() - start
+    print(f"--- {len(seconds)} tests in {elapsed:.2f}s over {args.shards} shards")
+    slowest = sorted(seconds.items(), key=lambda kv: kv[1], reverse=True)
+    for nodeid, s in slowest[: args.slowest]:
+        print(f"{s:8.3f}s  {nodeid}")
+
+    failed = [c for c in codes if c not in (0, NO_TESTS)]
+    if failed:
+        return failed[0]
+    return 0 if seconds else NO_TESTS
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,27 @@
-from hypothesis import settings
+import os
+
+from hypothesis import HealthCheck, settings
+from hypothesis.database import DirectoryBasedExampleDatabase
 from hypothesis.strategies import floats, integers
 
 import minitorch
 
 
 settings.register_profile("ci", deadline=None)
-settings.load_profile("ci")
+# For `tests/run_shards.py`: every shard shares one example database at the
+# repository root, so failing examples are replayed first on the next run.
+settings.register_profile(
+    "parallel",
+    deadline=None,
+    database=DirectoryBasedExampleDatabase(
+        os.path.join(
+            os.path.dirname(os.path.dirname(__file__)), ".hypothesis", "examples"
+        )
+    ),
+    suppress_health_check=[HealthCheck.too_slow],
+    print_blob=True,
+)
+settings.load_profile(os.environ.get("HYPOTHESIS_PROFILE", "ci"))
 
 
 small_ints = integers(min_value=1, max_value=3)
@@ -0,0 +1,132 @@
+import pickle
+from pathlib import Path
+
+import pytest
+from hypothesis import given
+from hypothesis.strategies import integers, sampled_from
+
+import minitorch
+
+from .strategies import med_ints
+
+# # Tests for datasets.py
+
+
+@given(sampled_from(list(minitorch.datasets)), integers(1, 500), med_ints)
+def test_stream_dataset(name: str, N: int, chunk_size: int) -> None:
+    """Streamed chunks cover the dataset and can be rebuilt one at a time"""
+    chunks = list(minitorch.stream_dataset(name, N, chunk_size, seed=1))
+    assert sum(c.N for c in chunks) == minitorch.dataset_size(name, N)
+    assert all(c.N == chunk_size for c in chunks[:-1])
+    for i, c in enumerate(chunks):
+        assert len(c.X) == len(c.y) == c.N
+        assert minitorch.dataset_chunk(name, N, chunk_size, i, seed=1) == c
+
+
+def test_stream_spiral() -> None:
+    full = minitorch.datasets["Spiral"](100)
+    chunks = list(minitorch.stream_dataset("Spiral", 100, 30))
+    assert [p for c in chunks for p in c.X] == full.X
+    assert [y for c in chunks for y in c.y] == full.y
+
+
+def test_dataset_chunk_range() -> None:
+    with pytest.raises(IndexError):
+        minitorch.dataset_chunk("Xor", 100, 30, 4)
+
+
+@given(sampled_from(list(minitorch.datasets)), med_ints)
+def test_columnar_graph(name: str, N: int) -> None:
+    """A columnar graph reads back exactly like the graph it was built from"""
+    graph = minitorch.datasets[name](N)
+    col = minitorch.ColumnarGraph.from_graph(graph)
+    assert col.N == graph.N
+    assert len(col.X) == len(graph.X)
+    assert list(col.X) == graph.X
+    if graph.X:
+        assert col.X[-1] == graph.X[-1]
+    assert col.X[1:3] == graph.X[1:3]
+    assert list(col.y) == graph.y
+    assert list(col.x1) == [p[0] for p in graph.X]
+    assert list(col.x2) == [p[1] for p in graph.X]
+    if graph.X:
+        assert col.buffer().shape == (len(graph.X), 2)
+        assert col.buffer().tolist() == [list(p) for p in graph.X]
+    assert col.to_graph() == graph
+
+
+def test_columnar_graph_pickle() -> None:
+    col = minitorch.ColumnarGraph.from_graph(minitorch.datasets["Xor"](20))
+    copy = pickle.loads(pickle.dumps(col))
+    assert list(copy.X) == list(col.X)
+    assert list(copy.y) == list(col.y)
+
+
+@pytest.mark.parametrize("use_numpy", [False, True])
+@given(sampled_from(list(minitorch.datasets)), med_ints)
+def test_generate_dataset(use_numpy: bool, name: str, N: int) -> None:
+    """Bulk generation labels points by the same rules as the list version"""
+    if use_numpy:
+        pytest.importorskip("numpy")
+    graph = minitorch.generate_dataset(name, N, seed=0, use_numpy=use_numpy)
+    assert graph.N == N
+    assert len(graph.X) == minitorch.dataset_size(name, N)
+    if name == "Spiral":
+        expected = minitorch.datasets["Spiral"](N)
+        assert list(graph.y) == expected.y
+        for p, q in zip(graph.X, expected.X):
+            assert p == pytest.approx(q)
+    else:
+        label = minitorch.dataset_labels[name]
+        assert list(graph.y) == [label(x_1, x_2) for x_1, x_2 in graph.X]
+
+
+@given(sampled_from(list(minitorch.datasets)), med_ints)
+def test_save_load_dataset(
+    tmp_path_factory: pytest.TempPathFactory, name: str, N: int
+) -> None:
+    """A saved dataset loads back with the same points and labels"""
+    path = str(tmp_path_factory.mktemp("data") / "graph.mtds")
+    graph = minitorch.datasets[name](N)
+    minitorch.save_dataset(graph, path)
+    loaded = minitorch.load_dataset(path)
+    assert loaded.N == graph.N
+    assert list(loaded.X) == graph.X
+    assert list(loaded.y) == graph.y
+
+
+def test_load_dataset_invalid(tmp_path: Path) -> None:
+    path = tmp_path / "bad.mtds"
+    path.write_bytes(b"not a dataset" * 4)
+    with pytest.raises(ValueError):
+        minitorch.load_dataset(str(path))
+
+
+@given(med_ints, med_ints)
+@pytest.mark.parametrize("columnar", [False, True])
+@pytest.mark.parametrize("shuffle", [False, True])
+def test_batches(columnar: bool, shuffle: bool, N: int, batch_size: int) -> None:
+    """Batches cover every point exactly once"""
+    graph = minitorch.datasets["Xor"](N)
+    data = minitorch.ColumnarGraph.from_graph(graph) if columnar else graph
+    parts = list(minitorch.batches(data, batch_size, shuffle=shuffle, seed=3))
+    assert all(p.N == batch_size for p in parts[:-1])
+    points = [(p, y) for part in parts for p, y in zip(part.X, part.y)]
+    expected = list(zip(graph.X, graph.y))
+    if shuffle:
+        assert sorted(points) == sorted(expected)
+    else:
+        assert points == expected
+
+
+def test_batches_stop_early() -> None:
+    graph = minitorch.datasets["Simple"](100)
+    it = minitorch.batches(graph, 10, prefetch=1)
+    assert next(it).N == 10
+    it.close()
+
+
+def test_batches_error() -> None:
+    graph = minitorch.Graph(2, [(0.0, 0.0), (1.0, 1.0)], [0])
+    with pytest.raises(IndexError):
+        list(minitorch.batches(graph, 2, shuffle=True))
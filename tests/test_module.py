@@ -1,3 +1,6 @@
+import pickle
+from array import array
+
 import pytest
 from hypothesis import given
 
@@ -137,6 +140,132 @@ def test_stacked_module(size_a: int, size_b: int, val: float) -> None:
     assert named_parameters["module_b.parameter_b"].value == VAL_B
 
 
+def test_named_parameters_cached() -> None:
+    """The parameter index is reused until the tree changes below it"""
+    mod = ModuleA1()
+    first = mod.named_parameters()
+    assert mod.named_parameters() is first
+    assert len(mod.parameters()) == 3
+
+    # A new parameter deep in the tree shows up at the root.
+    mod.b.c.p4 = minitorch.Parameter(20)
+    named = dict(mod.named_parameters())
+    assert named["b.c.p4"].value == 20
+    assert len(mod.parameters()) == 4
+
+    mod.a.add_parameter("p5", 25)
+    assert dict(mod.named_parameters())["a.p5"].value == 25
+
+    # Replacing a submodule drops its old parameters.
+    mod.b = ModuleA2()
+    named = dict(mod.named_parameters())
+    assert "b.c.p3" not in named
+    assert named["b.p2"].value == 10
+
+
+def test_flatten_parameters() -> None:
+    """Flattened parameters are views onto one shared buffer"""
+    mod = ModuleA1()
+    flat = mod.flatten_parameters()
+    assert list(flat.names) == ["p1", "a.p2", "b.c.p3"]
+    assert list(flat.data) == [5.0, 10.0, 15.0]
+
+    # Writes go both ways.
+    flat.data[1] = 11.0
+    assert mod.a.p2.value == 11.0
+    mod.b.c.p3.update(16.0)
+    assert flat.data[2] == 16.0
+
+    flat.step([1.0, 2.0, 3.0], 0.5)
+    assert [p.value for p in mod.parameters()] == [4.5, 10.0, 14.5]
+
+    saved = flat.tobytes()
+    flat.zero()
+    assert [p.value for p in mod.parameters()] == [0.0, 0.0, 0.0]
+    flat.frombytes(saved)
+    assert mod.p1.value == 4.5
+
+    other = ModuleA1().flatten_parameters()
+    other.copy_from(flat)
+    assert list(other.data) == [4.5, 10.0, 14.5]
+
+    with pytest.raises(ValueError):
+        flat.copy_from([1.0])
+    with pytest.raises(ValueError):
+        flat.step([1.0], 1.0)
+
+
+def test_flat_step_without_numpy(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(minitorch.operators, "np", None)
+    flat = ModuleA1().flatten_parameters()
+    flat.step(array("d", [1.0, 2.0, 3.0]), 0.5)
+    assert list(flat.data) == [4.5, 9.0, 13.5]
+    with pytest.raises(ValueError):
+        flat.step([1.0], 1.0)
+
+
+def test_attribute_access() -> None:
+    mod = ModuleA1()
+    assert mod.p1 is mod._parameters["p1"]
+    assert mod.a is mod._modules["a"]
+    assert not hasattr(mod.p1, "__dict__")
+
+    # Registered names never hide methods of the module.
+    p = mod.add_parameter("train", 1)
+    assert dict(mod.named_parameters())["train"] is p
+    assert mod.train != p
+
+    mod.p1 = 3
+    assert mod.p1 == 3
+
+
+def test_register_keeps_module_state() -> None:
+    """Parameters named like a module's own attributes do not replace them"""
+    mod = ModuleA1()
+    p = mod.add_parameter("training", 1.0)
+    assert mod.training is True
+    assert dict(mod.named_parameters())["training"] is p
+
+    mod.add_parameter("_parameters", 2.0)
+    mod.add_parameter("_versions", 3.0)
+    mod.p4 = minitorch.Parameter(4.0)
+    assert mod.p4.value == 4.0
+    assert len(mod.parameters()) == 7
+
+    # Registered parameters and submodules are still replaced.
+    mod.p4 = minitorch.Parameter(5.0)
+    assert mod.p4.value == 5.0
+    mod.a = ModuleA3()
+    assert "a.c.p3" in dict(mod.named_parameters())
+
+
+def test_pickle_module() -> None:
+    mod = pickle.loads(pickle.dumps(ModuleA1()))
+    assert [p.value for p in mod.parameters()] == [5.0, 10.0, 15.0]
+
+    # The copy's parameter index is still dropped on changes below it.
+    mod.b.c.p4 = minitorch.Parameter(20.0)
+    assert dict(mod.named_parameters())["b.c.p4"].value == 20.0
+
+
+def test_pickle_flat_parameters() -> None:
+    """Pickled flat parameters keep sharing one buffer."""
+    mod = ModuleA1()
+    flat = mod.flatten_parameters()
+    params, copy = pickle.loads(pickle.dumps((mod.parameters(), flat)))
+    assert [p.value for p in params] == [5.0, 10.0, 15.0]
+    copy.data[0] = 6.0
+    assert params[0].value == 6.0
+    assert mod.p1.value == 5.0
+
+
+def test_flatten_non_numeric() -> None:
+    mod = minitorch.Module()
+    mod.p = minitorch.Parameter(MockParam())
+    with pytest.raises(TypeError):
+        mod.flatten_parameters()
+
+
 # ## Misc Tests
 
 # Check that the module runs forward correctly.
@@ -163,6 +292,197 @@ def test_module_forward() -> None:
     assert mod() == 10
 
 
+class Add(minitorch.Module):
+    def forward(self, x: float) -> float:
+        return x + 1
+
+
+class Twice(minitorch.Module):
+    def __init__(self) -> None:
+        super().__init__()
+        self.inner = Add()
+
+    def forward(self, x: float) -> float:
+        return self.inner(self.inner(x))
+
+
+def test_forward_hooks() -> None:
+    mod = Twice()
+    seen = []
+    assert mod(1) == 3
+    pre = mod.inner.register_forward_pre_hook(lambda m, args: (args[0] * 10,))
+    post = mod.inner.register_forward_hook(lambda m, args, out: seen.append(out))
+    assert mod(1) == 111
+    assert seen == [11, 111]
+
+    pre.remove()
+    pre.remove()
+    assert mod(1) == 3
+    post.remove()
+    assert mod(1) == 3
+    assert seen == [11, 111, 2, 3]
+
+    with minitorch.register_module_forward_hook(lambda m, args, out: out * 2):
+        assert mod(1) == 20
+    assert mod(1) == 3
+
+
+class Scale(minitorch.Module):
+    def __init__(self) -> None:
+        super().__init__()
+        self.w = minitorch.Parameter(2.0)
+
+    def forward(self, xs: list) -> list:
+        return [x * self.w.value for x in xs]
+
+
+def test_cached_module() -> None:
+    mod = minitorch.CachedModule(Scale(), maxsize=2)
+    assert [n for n, _ in mod.named_parameters()] == ["module.w"]
+    assert mod([1.0]) == [2.0]
+    assert mod([1.0]) == [2.0]
+    assert mod.cache_info() == (1, 1, 2, 1)
+
+    mod.module.w.update(3.0)
+    assert mod([1.0]) == [3.0]
+    assert mod.cache_info().misses == 2
+    assert mod.cache_info().currsize == 1
+
+    # Changes to other modules keep the cache.
+    Scale().w.update(4.0)
+    ModuleA1().flatten_parameters().zero()
+    assert mod([1.0]) == [3.0]
+    assert mod.cache_info().misses == 2
+
+    mod([2.0])
+    mod([3.0])
+    assert mod.cache_info().currsize == 2
+    mod([1.0])
+    assert mod.cache_info().misses == 5
+
+    flat = mod.flatten_parameters()
+    flat.step([1.0], 1.0)
+    assert mod([1.0]) == [2.0]
+
+    # Unhashable arguments are passed through.
+    before = mod.cache_info()
+    assert mod(array("d", [1.0])) == [2.0]
+    assert mod.cache_info().currsize == before.currsize
+    assert mod.cache_info().misses == before.misses + 1
+
+    mod.cache_clear()
+    assert mod.cache_info() == (0, 0, 2, 0)
+
+
+def test_cached_module_watches_tree() -> None:
+    """Changes made through buffers and submodules added later clear the cache"""
+    scale = Scale()
+    flat = scale.flatten_parameters()
+    mod = minitorch.CachedModule(scale)
+    assert mod([1.0]) == [2.0]
+    flat.step([1.0], 1.0)
+    assert mod([1.0]) == [1.0]
+
+    scale.inner = Scale()
+    assert mod.cache_info().currsize == 1
+    mod([1.0])
+    assert mod.cache_info().currsize == 1
+    scale.inner.w.update(5.0)
+    mod([1.0])
+    assert mod.cache_info().misses == 4
+
+
+def test_cached_module_pickle() -> None:
+    """A pickled copy still sees changes to its own parameters only"""
+    mod = minitorch.CachedModule(Scale())
+    flat = mod.flatten_parameters()
+    copy, copy_flat = pickle.loads(pickle.dumps((mod, flat)))
+    assert copy([1.0]) == [2.0]
+
+    mod.module.w.update(5.0)
+    assert copy([1.0]) == [2.0]
+    copy.module.w.update(3.0)
+    assert copy([1.0]) == [3.0]
+    copy_flat.step([1.0], 1.0)
+    assert copy([1.0]) == [2.0]
+
+
+def test_profiler() -> None:
+    mod = Twice()
+    with minitorch.Profiler() as prof:
+        for _ in range(3):
+            mod(1)
+    mod(1)
+
+    assert set(prof.stats) == {"Twice", "Twice.inner"}
+    assert prof.stats["Twice"].count == 3
+    assert prof.stats["Twice.inner"].count == 6
+    outer, inner = prof.stats["Twice"], prof.stats["Twice.inner"]
+    assert outer.total >= inner.total
+    assert abs(outer.self_time - (outer.total - inner.total)) < 1e-6
+
+    events = prof.chrome_trace()["traceEvents"]
+    assert len(events) == 9
+    assert {e["name"] for e in events} == {"Twice", "Twice.inner"}
+    stacks = {line.rsplit(" ", 1)[0] for line in prof.folded().splitlines()}
+    assert stacks == {"Twice", "Twice;inner"}
+    assert "Twice.inner" in prof.table()
+
+
+def test_pickle_after_profiling() -> None:
+    """Modules called under a profiler pickle without its hooks"""
+    mod = Twice()
+    with minitorch.Profiler():
+        mod(1)
+    copy = pickle.loads(pickle.dumps(mod))
+    assert copy(1) == 3
+
+    with minitorch.register_module_forward_hook(lambda m, args, out: out * 2):
+        mod(1)
+        data = pickle.dumps(mod)
+    with minitorch.register_module_forward_hook(lambda m, args, out: out + 1):
+        assert pickle.loads(data)(1) == 6
+
+
+class Fails(minitorch.Module):
+    def __init__(self) -> None:
+        super().__init__()
+        self.inner = Add()
+
+    def forward(self, x: float) -> float:
+        return self.inner(x) + "1"
+
+
+def test_forward_hooks_always_call() -> None:
+    mod = Fails()
+    seen = []
+    mod.register_forward_hook(lambda m, args, out: seen.append("hook"))
+    always = mod.register_forward_hook(
+        lambda m, args, out: seen.append(out), always_call=True
+    )
+    with pytest.raises(TypeError):
+        mod(1)
+    assert seen == [None]
+
+    always.remove()
+    with pytest.raises(TypeError):
+        mod(1)
+    assert seen == [None]
+
+
+def test_profiler_raising_forward() -> None:
+    """A call that raises does not leave its frame on the stack"""
+    fails, mod = Fails(), Twice()
+    with minitorch.Profiler() as prof:
+        with pytest.raises(TypeError):
+            fails(1)
+        mod(1)
+
+    assert set(prof.stats) == {"Fails", "Fails.inner", "Twice", "Twice.inner"}
+    assert prof.stats["Fails"].count == 1
+    assert prof.stats["Twice"].count == 1
+
+
 # Internal check for the system.
 
 
@@ -1,28 +1,48 @@
-from typing import Callable, List, Tuple
+import math
+from array import array
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Tuple
 
 import pytest
 from hypothesis import given
 from hypothesis.strategies import lists
 
-from minitorch import MathTest
+from minitorch import MathTest, MathTestVariable
 import minitorch
 from minitorch.operators import (
     add,
+    add_buffer,
+    addBuffers,
     addLists,
     eq,
+    exp,
+    exp_buffer,
+    fuse,
     id,
     inv,
     inv_back,
+    inv_back_buffer,
+    inv_buffer,
+    log,
     log_back,
+    log_back_buffer,
+    log_buffer,
     lt,
     max,
     mul,
+    mul_buffer,
     neg,
+    negBuffer,
     negList,
     prod,
+    prodBuffer,
     relu,
     relu_back,
+    relu_back_buffer,
+    relu_buffer,
     sigmoid,
+    sigmoid_buffer,
+    sumBuffer,
 )
 
 from .strategies import assert_close, small_floats
@@ -216,8 +236,159 @@ def test_two_args(
     base_fn(t1, t2)
 
 
+@given(lists(small_floats, min_size=1))
+@pytest.mark.parametrize("fn", one_arg)
+def test_fused_one_args(
+    fn: Tuple[str, Callable[[float], float]], ls: List[float]
+) -> None:
+    """A fused kernel matches the operators it was built from, forward and back."""
+    name, base_fn = fn
+    kernel = fuse(getattr(MathTestVariable, name))
+    xs = array("d", ls)
+    for x, z in zip(xs, kernel(xs)):
+        assert_close(z, base_fn(x))
+
+    eps = 1e-6
+    ds = array("d", [1.0] * len(ls))
+    for x, g in zip(xs, kernel.backward(xs, ds)):
+        left = (base_fn(x) - base_fn(x - eps)) / eps
+        right = (base_fn(x + eps) - base_fn(x)) / eps
+        if abs(left - right) > 1e-3:
+            # Skip kinks and points too close to a pole.
+            continue
+        assert_close(g, (left + right) / 2)
+
+
+@given(lists(small_floats, min_size=1), small_floats)
+def test_fused_shared(ls: List[float], d: float) -> None:
+    """Values used twice get both contributions in the backward pass."""
+    kernel = fuse(lambda a: a * a + (a / 10.0).exp())
+    xs = array("d", ls)
+    for x, z in zip(xs, kernel(xs)):
+        assert_close(z, x * x + exp(x / 10.0))
+    for x, g in zip(xs, kernel.backward(xs, array("d", [d] * len(ls)))):
+        assert_close(g, d * (2 * x + exp(x / 10.0) / 10.0))
+
+
+def test_fused_non_finite() -> None:
+    """Infinite and NaN constants compile."""
+    xs = array("d", [1.0, 2.0])
+    ds = array("d", [1.0, 1.0])
+    kernel = fuse(lambda a: a * float("inf") - float("-inf"))
+    assert list(kernel(xs)) == [float("inf")] * 2
+    assert list(kernel.backward(xs, ds)) == [float("inf")] * 2
+    assert all(math.isnan(z) for z in fuse(lambda a: a + float("nan"))(xs))
+
+
 @given(small_floats, small_floats)
 def test_backs(a: float, b: float) -> None:
     relu_back(a, b)
     inv_back(a + 2.4, b)
     log_back(abs(a) + 4, b)
+
+
+# ## Bulk operators
+
+# The buffer variants must agree with the scalar prelude, with and
+# without NumPy.
+
+
+@contextmanager
+def bulk_backend(python: bool) -> Iterator[None]:
+    with pytest.MonkeyPatch.context() as mp:
+        if python:
+            mp.setattr(minitorch.operators, "np", None)
+        yield
+
+
+@pytest.mark.parametrize("python", [False, True])
+@given(lists(small_floats, min_size=1), lists(small_floats, min_size=1))
+def test_buffer_binary(python: bool, ls1: List[float], ls2: List[float]) -> None:
+    n = min(len(ls1), len(ls2))
+    xs, ys = array("d", ls1[:n]), array("d", ls2[:n])
+    with bulk_backend(python):
+        for i, z in enumerate(mul_buffer(xs, ys)):
+            assert_close(z, mul(xs[i], ys[i]))
+        for i, z in enumerate(add_buffer(xs, ys)):
+            assert_close(z, add(xs[i], ys[i]))
+
+
+@pytest.mark.parametrize("python", [False, True])
+@given(lists(small_floats, min_size=1))
+def test_buffer_unary(python: bool, ls: List[float]) -> None:
+    xs = array("d", ls)
+    pos = array("d", [abs(x) + 4 for x in ls])
+    small = array("d", [x / 50.0 for x in ls])
+    with bulk_backend(python):
+        for i, z in enumerate(sigmoid_buffer(xs)):
+            assert_close(z, sigmoid(xs[i]))
+        for i, z in enumerate(relu_buffer(xs)):
+            assert_close(z, relu(xs[i]))
+        for i, z in enumerate(log_buffer(pos)):
+            assert_close(z, log(pos[i]))
+        for i, z in enumerate(inv_buffer(pos)):
+            assert_close(z, inv(pos[i]))
+        for i, z in enumerate(exp_buffer(small)):
+            assert_close(z, exp(small[i]))
+
+
+@pytest.mark.parametrize("python", [False, True])
+@given(lists(small_floats, min_size=1), small_floats)
+def test_buffer_backs(python: bool, ls: List[float], d: float) -> None:
+    xs = array("d", ls)
+    pos = array("d", [abs(x) + 4 for x in ls])
+    ds = array("d", [d] * len(ls))
+    with bulk_backend(python):
+        for i, z in enumerate(relu_back_buffer(xs, ds)):
+            assert_close(z, relu_back(xs[i], d))
+        for i, z in enumerate(log_back_buffer(pos, ds)):
+            assert_close(z, log_back(pos[i], d))
+        for i, z in enumerate(inv_back_buffer(pos, ds)):
+            assert_close(z, inv_back(pos[i], d))
+
+
+@given(lists(small_floats, min_size=1))
+def test_buffer_numpy(ls: List[float]) -> None:
+    """NumPy arrays in give NumPy arrays out."""
+    np = pytest.importorskip("numpy")
+    xs = np.array(ls)
+    for z in (sigmoid_buffer(xs), mul_buffer(xs, xs), negBuffer(xs)):
+        assert isinstance(z, np.ndarray)
+        assert z.shape == xs.shape
+    out = np.zeros(len(ls))
+    assert relu_back_buffer(xs, xs, out=out) is out
+    for i, z in enumerate(out):
+        assert_close(z, relu_back(ls[i], ls[i]))
+
+
+@pytest.mark.parametrize("python", [False, True])
+@given(lists(small_floats, min_size=1))
+def test_buffer_out(python: bool, ls: List[float]) -> None:
+    xs = array("d", ls)
+    out = array("d", [0.0] * len(ls))
+    with bulk_backend(python):
+        assert negBuffer(xs, out=out) is out
+        for i, j in zip(negList(ls), out):
+            assert_close(i, j)
+
+        # Writing back into the input is allowed.
+        view = memoryview(xs)
+        addBuffers(view, view, out=view)
+        for i, j in zip(ls, xs):
+            assert_close(2 * i, j)
+
+        # So is a list.
+        dest = [0.0] * len(ls)
+        assert negBuffer(xs, out=dest) is dest
+        for i, j in zip(xs, dest):
+            assert_close(-i, j)
+
+        with pytest.raises(ValueError):
+            negBuffer(xs, out=array("d", [0.0] * (len(ls) + 1)))
+
+
+@given(lists(small_floats, min_size=1, max_size=10))
+def test_buffer_reductions(ls: List[float]) -> None:
+    xs = array("d", ls)
+    assert_close(sumBuffer(xs), minitorch.operators.sum(ls))
+    assert_close(prodBuffer(xs[:3]), prod(ls[:3]))
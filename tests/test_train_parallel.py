@@ -0,0 +1,21 @@
+from pathlib import Path
+
+import pytest
+
+import minitorch
+
+PROJECT = Path(__file__).resolve().parent.parent / "project"
+
+
+def test_train_parallel_worker_error(monkeypatch: pytest.MonkeyPatch) -> None:
+    """A worker that raises stops training with its error instead of hanging."""
+    pytest.importorskip("torch")
+    monkeypatch.syspath_prepend(str(PROJECT))
+    from run_torch import TorchTrain
+
+    data = minitorch.datasets["Xor"](40)
+    # Points of the wrong size make the second worker's forward raise.
+    X = data.X[:20] + [(0.5, 0.5, 0.5)] * 20
+    data = minitorch.Graph(40, X, data.y)
+    with pytest.raises(RuntimeError, match="worker 1 raised"):
+        TorchTrain(4).train(data, 0.5, 20, lambda *args: None, workers=2)